@@ -0,0 +1,56 @@
+"""
+Measure the bytes saved and the CPU spent compressing JSON responses.
+
+    python -m benchmarks.compression --licenses 20 --destinations 50
+"""
+
+import argparse
+import timeit
+
+from score.app import CATEGORY_NOTES
+from score.utils.fast_json import Encoded, compress, supported_encodings
+
+from .json_responses import make_source
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--licenses", type=int, default=20)
+    parser.add_argument("--destinations", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    responses = {
+        "source": Encoded.of(make_source(args.licenses, args.destinations)),
+        "notes": CATEGORY_NOTES,
+    }
+    print(
+        f"{'response':>10} {'encoding':>9} {'bytes':>8} {'ratio':>6}"
+        f" {'compress ms':>12} {'cached us':>10}"
+    )
+    for name, encoded in responses.items():
+        print(f"{name:>10} {'identity':>9} {len(encoded.body):>8}")
+        for encoding in supported_encodings():
+            body = compress(encoded.body, encoding)
+            seconds = min(
+                timeit.repeat(
+                    lambda: compress(encoded.body, encoding),
+                    number=1,
+                    repeat=args.repeat,
+                )
+            )
+            encoded.encoded_body(encoding)
+            cached = min(
+                timeit.repeat(
+                    lambda: encoded.encoded_body(encoding), number=1000, repeat=5
+                )
+            )
+            print(
+                f"{name:>10} {encoding:>9} {len(body):>8}"
+                f" {len(encoded.body) / len(body):>6.1f}"
+                f" {seconds * 1000:>12.3f} {cached * 1000:>10.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Compare requests per second of a route returning a Source through its
+response_model against one returning the bytes of fast_json.Encoded.
+
+    python -m benchmarks.json_responses --licenses 20 --destinations 50
+"""
+
+import argparse
+import time
+from datetime import datetime
+
+from fastapi import FastAPI, Request, Response
+from fastapi.testclient import TestClient
+
+from score.models import License, Source
+from score.utils.fast_json import Encoded, json_response
+
+
+def make_source(licenses: int, destinations: int) -> Source:
+    return Source(
+        source_url="https://github.com/example/example",
+        licenses=[
+            License(
+                path=f"licenses/LICENSE-{i}",
+                license="Apache-2.0",
+                kind="Permissive",
+                similarity=0.97,
+                modified=True,
+                md5="0" * 32,
+                content_sha256="0" * 64,
+                restrictions=["patent-grant"],
+                spdx_id="Apache-2.0",
+                is_osi_approved=True,
+            )
+            for i in range(licenses)
+        ],
+        package_destinations=[
+            (f"pypi/package-{i}", f"packages/{i}/pyproject.toml")
+            for i in range(destinations)
+        ],
+        recent_authors_count=12,
+        max_monthly_authors_count=30,
+        first_commit=datetime(2015, 1, 1),
+        latest_commit=datetime(2025, 1, 1),
+        head_sha="0" * 40,
+    )
+
+
+def make_app(source: Source) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/response-model", response_model=Source)
+    def response_model():
+        return source
+
+    @app.get("/fast-json", response_model=Source)
+    def fast_json(request: Request, response: Response):
+        return json_response(Encoded.of(source), request, response)
+
+    return app
+
+
+def requests_per_second(client: TestClient, path: str, seconds: float) -> float:
+    client.get(path)
+    count = 0
+    s = time.perf_counter()
+    while time.perf_counter() - s < seconds:
+        client.get(path)
+        count += 1
+    return count / (time.perf_counter() - s)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--licenses", type=int, default=20)
+    parser.add_argument("--destinations", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=3)
+    args = parser.parse_args()
+
+    client = TestClient(make_app(make_source(args.licenses, args.destinations)))
+    first = client.get("/response-model")
+    assert client.get("/fast-json").content == first.content
+    print(f"response size: {len(first.content)} bytes")
+
+    for path in ["/response-model", "/fast-json"]:
+        rps = requests_per_second(client, path, args.seconds)
+        print(f"{path:>16}: {rps:8.1f} requests/s")
+
+
+if __name__ == "__main__":
+    main()
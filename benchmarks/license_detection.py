@@ -0,0 +1,163 @@
+"""
+Measure the speed and accuracy of license detection on a labelled corpus.
+
+    python -m benchmarks.license_detection --licenses 20
+
+The corpus is generated from the bundled reference licenses and files in
+this repo, so it runs offline:
+
+ * canonical: the reference texts as shipped
+ * modified: reference texts with a new copyright line and a few words changed
+ * multi: two reference licenses in one file, either one is a correct answer
+ * not-license: source files and docs, which should be Unknown
+"""
+
+import argparse
+import random
+import statistics
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from score.git_vcs.canonical_licenses import read_license
+from score.git_vcs.license_detection import (
+    CLOSE_ENOUGH,
+    PROBABLY_NOT,
+    get_reference_matcher,
+    license_dir,
+    match_license,
+)
+from score.models import License
+
+repo_root = Path(__file__).parent.parent
+
+# Reference file names that the matchers report under their SPDX id
+ALIASES = {
+    "bsd-2": "bsd-2-clause",
+    "bsd-3": "bsd-3-clause",
+    "upl": "upl-1.0",
+}
+SPDX_SUFFIXES = ["-only", "-or-later", "+", "-no-copyleft-exception", "-url"]
+
+
+@dataclass
+class Sample:
+    category: str
+    content: str
+    # Any of these is a correct answer
+    labels: list[str]
+
+
+def canonical_id(name: str) -> str:
+    name = name.lower()
+    for suffix in SPDX_SUFFIXES:
+        name = name.removesuffix(suffix)
+    return ALIASES.get(name, name)
+
+
+def is_correct(sample: Sample, license: License) -> bool:
+    found = canonical_id(license.license or "Unknown")
+    return any(found == canonical_id(label) for label in sample.labels)
+
+
+def edit_words(text: str, edits: int, rng: random.Random) -> str:
+    words = text.split(" ")
+    for _ in range(edits):
+        words[rng.randrange(len(words))] = rng.choice(["foo", "bar", "baz"])
+    return " ".join(words)
+
+
+def make_corpus(licenses: int, variants: int, edits: int, seed: int) -> list[Sample]:
+    rng = random.Random(seed)
+    references = {path.name: read_license(path) for path in license_dir.iterdir()}
+    names = rng.sample(sorted(references), min(licenses, len(references)))
+
+    corpus = [Sample("canonical", references[name], [name]) for name in names]
+
+    for name in names:
+        for _ in range(variants):
+            year = rng.randint(1990, 2025)
+            content = f"Copyright (c) {year} Example Corp\n\n" + edit_words(
+                references[name], edits, rng
+            )
+            corpus.append(Sample("modified", content, [name]))
+
+    for first, second in zip(names, names[1:] + names[:1]):
+        content = f"{references[first]}\n\n---\n\n{references[second]}"
+        corpus.append(Sample("multi", content, [first, second]))
+
+    others = sorted(repo_root.glob("score/**/*.py")) + [repo_root / "README.md"]
+    for path in rng.sample(others, min(licenses, len(others))):
+        corpus.append(Sample("not-license", read_license(path), ["Unknown"]))
+
+    return corpus
+
+
+def percentile(values: list[float], p: int) -> float:
+    if len(values) < 2:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[p - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--licenses", type=int, default=20)
+    parser.add_argument("--variants", type=int, default=2)
+    parser.add_argument("--edits", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.licenses, args.variants, args.edits, args.seed)
+
+    # Load the matchers outside of the timings
+    s = time.perf_counter()
+    match_license("MIT License")
+    get_reference_matcher()
+    print(f"warm up: {time.perf_counter() - s:.2f} s")
+
+    results = []
+    for sample in corpus:
+        s = time.perf_counter()
+        license = match_license(sample.content)
+        results.append((sample, license, time.perf_counter() - s))
+
+    total = sum(elapsed for _, _, elapsed in results)
+    print(
+        f"{len(results)} files in {total:.2f} s, {len(results) / total:.1f} files/s\n"
+    )
+    header = (
+        f"{'category':>12} {'files':>6} {'accuracy':>9} {'p50 ms':>8} {'p99 ms':>8}"
+    )
+    header += f" {'>=close':>8} {'>=probably':>11}"
+    print(header)
+
+    categories = list(dict.fromkeys(sample.category for sample in corpus)) + ["all"]
+    for category in categories:
+        rows = [r for r in results if category in ("all", r[0].category)]
+        latencies = [elapsed * 1000 for _, _, elapsed in rows]
+        correct = sum(is_correct(sample, license) for sample, license, _ in rows)
+        similarities = [license.similarity or 0 for _, license, _ in rows]
+        close = sum(similarity >= CLOSE_ENOUGH for similarity in similarities)
+        probably = sum(similarity >= PROBABLY_NOT for similarity in similarities)
+        print(
+            f"{category:>12} {len(rows):>6} {correct / len(rows):>9.1%}"
+            f" {percentile(latencies, 50):>8.1f} {percentile(latencies, 99):>8.1f}"
+            f" {close / len(rows):>8.1%} {probably / len(rows):>11.1%}"
+        )
+
+    misses = [
+        (sample, license)
+        for sample, license, _ in results
+        if not is_correct(sample, license)
+    ]
+    if misses:
+        print("\nincorrect:")
+    for sample, license in misses:
+        print(
+            f"  {sample.category:>12} expected {'|'.join(sample.labels)}"
+            f" got {license.license} ({license.similarity:.3f})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Compare scoring a license against every reference with the shingle matrix
+against the per-reference strsimpy loop it replaced.
+
+    python -m benchmarks.license_similarity --licenses 20
+"""
+
+import argparse
+import random
+import timeit
+
+from strsimpy import SorensenDice
+
+from score.git_vcs.license_detection import (
+    get_all_licenses,
+    get_reference_matcher,
+    get_reference_profiles,
+    normalize,
+    shingles,
+)
+
+
+def make_licenses(n: int, edits: int, seed: int = 0) -> list[str]:
+    "Reference licenses with a few words changed, as found in the wild"
+    rng = random.Random(seed)
+    references = list(get_all_licenses().values())
+    licenses = []
+    for _ in range(n):
+        words = rng.choice(references).split()
+        for _ in range(edits):
+            words[rng.randrange(len(words))] = rng.choice(["foo", "bar", "baz"])
+        licenses.append(" ".join(words))
+    return licenses
+
+
+def strsimpy_best_match(content: str):
+    sd = SorensenDice()
+    similarities = {
+        name: sd.similarity(content, reference.text)
+        for name, reference in get_reference_profiles().items()
+    }
+    best_match = max(similarities, key=similarities.__getitem__)
+    return best_match, similarities[best_match]
+
+
+def matrix_best_match(content: str):
+    return get_reference_matcher().best_match(content, shingles(content))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--licenses", type=int, default=20)
+    parser.add_argument("--edits", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    licenses = [normalize(text) for text in make_licenses(args.licenses, args.edits)]
+    # Build the matrix outside of the timings
+    get_reference_matcher()
+
+    for content in licenses:
+        expected = strsimpy_best_match(content)
+        assert matrix_best_match(content) == expected, content[:80]
+
+    for name, fn in [
+        ("matrix", matrix_best_match),
+        ("strsimpy", strsimpy_best_match),
+    ]:
+        best = min(
+            timeit.repeat(
+                lambda: [fn(content) for content in licenses],
+                number=1,
+                repeat=args.repeat,
+            )
+        )
+        print(f"{name:>9}: {best / len(licenses) * 1000:8.2f} ms per license")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Compare the pure python monthly-authors computation against the pandas
+resample + rolling implementation it replaced.
+
+    python -m benchmarks.rolling_authors --commits 100000
+"""
+
+import argparse
+import random
+import subprocess
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+from score.git_vcs.commit_stats import summarize_commits
+
+
+def make_commits(n: int, authors: int, years: int, seed: int = 0):
+    rng = random.Random(seed)
+    end = int(datetime.now().timestamp())
+    start = end - years * 365 * 86400
+    emails = [f"author{i}@example.com" for i in range(authors)]
+    return [(rng.choice(emails), rng.randint(start, end)) for _ in range(n)]
+
+
+def pandas_summarize_commits(commits, one_year_ago):
+    import pandas as pd
+
+    df = pd.DataFrame(commits, columns=["email", "when"])
+    df = df[~df.email.str.endswith("github.com")]
+    df["when"] = pd.to_datetime(df.when, unit="s")
+    recent_authors_count = df[df.when > one_year_ago].email.nunique()
+    daily_authors = df.sort_values("when").set_index("when").resample("D")["email"]
+    rolling_authors = daily_authors.nunique().rolling(window="30D").sum()
+    return {
+        "recent_authors_count": int(recent_authors_count),
+        "max_monthly_authors_count": int(rolling_authors.max()),
+        "first_commit": df.when.min(),
+        "latest_commit": df.when.max(),
+    }
+
+
+def import_time(module: str) -> float:
+    "Wall time to import `module` in a fresh interpreter"
+    code = f"import time; s = time.perf_counter(); import {module}; print(time.perf_counter() - s)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, check=True)
+    return float(out.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--commits", type=int, default=100_000)
+    parser.add_argument("--authors", type=int, default=500)
+    parser.add_argument("--years", type=int, default=15)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    commits = make_commits(args.commits, args.authors, args.years)
+    one_year_ago = datetime.now() - timedelta(days=365)
+
+    pure = summarize_commits(commits, one_year_ago)
+    reference = pandas_summarize_commits(commits, one_year_ago)
+    assert pure == reference, (pure, reference)
+
+    for name, fn in [
+        ("pure python", summarize_commits),
+        ("pandas", pandas_summarize_commits),
+    ]:
+        best = min(
+            timeit.repeat(
+                lambda: fn(commits, one_year_ago), number=1, repeat=args.repeat
+            )
+        )
+        print(f"{name:>12}: {best * 1000:8.2f} ms for {len(commits)} commits")
+
+    for module in ["score.git_vcs.commit_stats", "pandas"]:
+        print(f"import {module}: {import_time(module) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,33 @@
 import logging
 import os
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
 from typing import Optional
 from uuid import uuid4
 
-from fastapi import FastAPI, Request, Response
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from score.models import NoteDescr, Package, Score, Source, Vulnerabilities
 
 from .app_utils import (
     create_git_metadata_cached,
+    get_license_diff_cached,
     get_package_data_cached,
+    get_score_response,
     get_vuln_data_cached,
     max_age,
+    save_score_response,
+    score_response_key,
 )
 from .cloud_logging.middleware import LoggingMiddleware
-from .cloud_logging.search import get_recent_packages
 from .cloud_logging.setup import setup_logging
+from .git_vcs.clone_scheduler import clone_scheduler
+from .git_vcs.license_detection import get_reference_matcher
 from .notes.notes import ScoreCategories, ScoreGroups, to_dict
+from .recent_packages import RECENT_PACKAGES_SIZE, recently_scored
 from .score.app_score import build_score
+from .utils.fast_json import Encoded, json_response
 
 # logging.basicConfig(level=logging.INFO)
 log = logging.getLogger(__name__)
@@ -39,11 +47,21 @@ Info:
 
     """
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    recently_scored.start()
+    # Built before the first request instead of on the first unmatched license
+    get_reference_matcher()
+    yield
+
+
 app = FastAPI(
     title="opensourcescore.dev",
     summary="Discover and evaluate open source projects with ease",
     description=DESCRIPTION,
     version=VERSION,
+    lifespan=lifespan,
 )
 
 RUN_ENV = os.environ.get("RUN_ENV", "development")
@@ -74,7 +92,7 @@ class ScoreResponse:
 async def add_process_time_header(request: Request, call_next):
     response = await call_next(request)
 
-    response.headers["Cache-control"] = f"max-age={max_age}, public"
+    response.headers.setdefault("Cache-control", f"max-age={max_age}, public")
     response.headers["Content-Language"] = "en-US"
     response.headers["App"] = f"{TITLE} {VERSION}".encode(
         "ascii", errors="ignore"
@@ -92,10 +110,21 @@ async def root():
     }
 
 
+# The notes only change with a deploy
+NOTES = Encoded.of(to_dict())
+CATEGORY_NOTES = Encoded.of(
+    NotesResponse(
+        notes={v["code"]: NoteDescr(**v) for v in to_dict().values()},
+        categories=ScoreCategories.values(),
+        groups=ScoreGroups.values(),
+    )
+)
+
+
 @app.get("/notes", tags=["notes"], summary="depricated")
-async def notes():
+async def notes(request: Request, response: Response):
     "depricated"
-    return to_dict()
+    return json_response(NOTES, request, response)
 
 
 @app.get(
@@ -104,20 +133,16 @@ async def notes():
     summary="Return notes in a dictionary format",
     response_model=NotesResponse,
 )
-async def category_notes():
-    return {
-        "notes": {v["code"]: v for k, v in to_dict().items()},
-        "categories": ScoreCategories.values(),
-        "groups": ScoreGroups.values(),
-    }
+async def category_notes(request: Request, response: Response):
+    return json_response(CATEGORY_NOTES, request, response)
 
 
 @app.get("/pkg/{ecosystem}/{package_name:path}", tags=["pkg"], response_model=Package)
-def get_pkg(response: Response, ecosystem: str, package_name: str):
+def get_pkg(request: Request, response: Response, ecosystem: str, package_name: str):
 
     data = get_package_data_cached(ecosystem, package_name, response.headers.append)
 
-    return data
+    return json_response(Encoded.of(data), request, response)
 
 
 @app.get(
@@ -127,6 +152,7 @@ def get_pkg(response: Response, ecosystem: str, package_name: str):
     response_model=ScoreResponse,
 )
 def any_score(
+    request: Request,
     response: Response,
     ecosystem: str,
     package_name: str,
@@ -141,6 +167,7 @@ def any_score(
         invalidate_cache=invalidate_cache,
     )
 
+    key_source_url = source_url
     if not source_url:
         source_url = package_data.source_url
     source_data = None
@@ -156,9 +183,20 @@ def any_score(
         invalidate_cache=invalidate_cache,
     )
 
+    key = score_response_key(
+        ecosystem, package_name, key_source_url, package_data, source_data, vuln_data
+    )
+    if package_data.status == "ok":
+        recently_scored.add(ecosystem, package_name)
+
+    encoded = None if key is None or invalidate_cache else get_score_response(key)
+    response.headers.append("score-cache-hit", str(encoded is not None).lower())
+    if encoded is not None:
+        return json_response(encoded, request, response)
+
     score = build_score(source_url, source_data, package_data, vuln_data)
 
-    return ScoreResponse(
+    score_response = ScoreResponse(
         ecosystem=ecosystem,
         package_name=package_name,
         package=package_data,
@@ -167,12 +205,32 @@ def any_score(
         status=package_data.status,
         vulnerabilities=vuln_data,
     )
+    encoded = Encoded.of(score_response)
+    if key is not None:
+        save_score_response(key, encoded)
+    return json_response(encoded, request, response)
 
 
 @app.get("/source/git/{source_url:path}", tags=["source", "git"], response_model=Source)
-def git(response: Response, source_url: str):
+def git(request: Request, response: Response, source_url: str):
     data = create_git_metadata_cached(source_url, response.headers.append)
-    return data
+    return json_response(Encoded.of(data), request, response)
+
+
+@app.get(
+    "/license/diff/{reference}/{content_sha256}",
+    tags=["license"],
+    summary="diff of a modified license file with its closest reference license",
+    response_class=PlainTextResponse,
+)
+def license_diff(reference: str, content_sha256: str):
+    diff = get_license_diff_cached(reference, content_sha256)
+    if diff is None:
+        raise HTTPException(status_code=404, detail="Unknown license or content")
+    # Content addressed, the diff never changes
+    return PlainTextResponse(
+        diff, headers={"Cache-control": "max-age=31536000, public, immutable"}
+    )
 
 
 @app.exception_handler(Exception)
@@ -197,10 +255,18 @@ async def exception_handler(request: Request, exc: Exception):
     tags=["recent", "search"],
     summary="get recent packages ",
 )
-def recent_packages(limit: int = 8):
+def recent_packages(limit: int = Query(8, ge=0, le=RECENT_PACKAGES_SIZE)):
+    return {"recent_packages": recently_scored.recent(limit)}
+
 
-    pkgs = get_recent_packages(limit=limit)
-    return {"recent_packages": pkgs}
+@app.get(
+    "/metrics/clones",
+    tags=["metrics"],
+    summary="clone queue depth, wait times and disk usage on this instance",
+)
+def clone_metrics(response: Response):
+    response.headers["Cache-control"] = "no-store"
+    return clone_scheduler.stats()
 
 
 @app.get("/error")
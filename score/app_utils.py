@@ -1,23 +1,64 @@
 import logging
-from typing import Callable
+import re
+import threading
+from dataclasses import replace
+from typing import Any, Callable, Optional
 from urllib.parse import quote_plus
 
+from cachetools import LRUCache, TTLCache
 from fastapi import HTTPException
 
 from .conda.scrape_conda import get_conda_package_data
-from .git_vcs.scrape import create_git_metadata
+from .git_vcs.license_detection import (
+    get_all_licenses,
+    license_content_path,
+    license_diff,
+)
+from .git_vcs.scrape import SCRAPER_VERSION, create_git_metadata
 from .models import Package, Source, Vulnerabilities
 from .npm.scrape_npm import get_npm_package_data
 from .pypi.json_scraper import get_package_data as get_pypi_package_data
-from .utils.caching import cache_hit, cache_path, load_from_cache, save_to_cache
+from .utils.caching import (
+    cache_hit,
+    cache_path,
+    content_digest,
+    load_from_cache,
+    load_text_from_cache,
+    save_to_cache,
+)
+from .utils.fast_json import Encoded
+from .utils.normalize_source_url import normalize_source_url
 from .vulnerabilities.scrape_vulnerabilities import scrape_vulnerability
 
 max_age = 60 * 60
+# recent_authors_count is relative to the day the repo was scraped, so even
+# an unchanged repo is scraped again after this many days
+SHA_CACHE_DAYS = 7
 log = logging.getLogger(__name__)
 
 AppendHeader = Callable[[str, str], None]
 
 
+def sha_cache_path(url: str, head_sha: str) -> str:
+    repo = quote_plus(normalize_source_url(url) or url)
+    return cache_path(f"git-sha/{repo}/{head_sha}-v{SCRAPER_VERSION}.json")
+
+
+def load_git_metadata_by_sha(url: str, head_sha: str) -> Optional[Source]:
+    """
+    The stored results for a commit, if they are at most SHA_CACHE_DAYS
+    old. Those are the same as a new scrape except for the counts of recent
+    authors.
+    """
+    cache_filename = sha_cache_path(url, head_sha)
+    if not cache_hit(cache_filename, days=SHA_CACHE_DAYS):
+        return None
+    cached_git = load_from_cache(Source, cache_filename)
+    if cached_git is None or cached_git.error is not None:
+        return None
+    return replace(cached_git, source_url=url)
+
+
 def create_git_metadata_cached(
     url: str, append_header: AppendHeader, invalidate_cache=False
 ) -> Source:
@@ -35,13 +76,80 @@ def create_git_metadata_cached(
                 return cached_git
 
     append_header("git-cache-hit", "false")
-    git = create_git_metadata(url)
+
+    sha_hits = []
+
+    def lookup(head_sha: str) -> Optional[Source]:
+        if invalidate_cache:
+            return None
+        known = load_git_metadata_by_sha(url, head_sha)
+        sha_hits.append(known is not None)
+        return known
+
+    git = create_git_metadata(url, lookup=lookup)
+    append_header("git-sha-cache-hit", str(any(sha_hits)).lower())
     if git.error is None:
         save_to_cache(git, cache_filename)
+        if git.head_sha is not None and not any(sha_hits):
+            save_to_cache(git, sha_cache_path(url, git.head_sha))
 
     return git
 
 
+license_diffs: LRUCache = LRUCache(1024)
+SHA256_HEX = re.compile("[0-9a-f]{64}")
+
+
+def get_license_diff_cached(reference: str, content_sha256: str) -> Optional[str]:
+    "Diff of a modified license, None if the reference or content is unknown"
+    # Both come from the request path, check them before building a path
+    if reference not in get_all_licenses() or not SHA256_HEX.fullmatch(content_sha256):
+        return None
+
+    key = (reference, content_sha256)
+    if key in license_diffs:
+        return license_diffs[key]
+
+    content = load_text_from_cache(license_content_path(content_sha256))
+    if content is None:
+        return None
+
+    diff = license_diffs[key] = license_diff(reference, content)
+    return diff
+
+
+# Serialized /score responses. Notes that depend on the current date can
+# change while the inputs do not, so entries expire with the max-age.
+score_responses: TTLCache = TTLCache(4096, ttl=max_age)
+score_responses_lock = threading.Lock()
+
+
+def score_response_key(
+    ecosystem: str, package_name: str, source_url: Optional[str], *inputs: Any
+) -> Optional[tuple]:
+    """
+    Key of a /score response by the content of its inputs, None if an input
+    did not go through the cache and has no content digest.
+    """
+    digests = []
+    for data in inputs:
+        digest = None if data is None else content_digest(data)
+        if data is not None and digest is None:
+            return None
+        digests.append(digest)
+    return (ecosystem, package_name, source_url, *digests)
+
+
+def get_score_response(key: tuple) -> Optional[Encoded]:
+    with score_responses_lock:
+        return score_responses.get(key)
+
+
+def save_score_response(key: tuple, encoded: Encoded) -> None:
+    with score_responses_lock:
+        score_responses[key] = encoded
+
+
 def get_vuln_data_cached(
     ecosystem: str,
     package_name: str,
@@ -0,0 +1,10 @@
+import pytest
+
+from score.utils import caching
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    "A cache backend in a temporary directory"
+    monkeypatch.setattr(caching, "CACHE_LOCATION", str(tmp_path))
+    return tmp_path
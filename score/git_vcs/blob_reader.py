@@ -0,0 +1,194 @@
+import io
+import logging
+import os
+import subprocess
+import threading
+import time
+from typing import IO, Iterable, Optional, Protocol
+from weakref import WeakKeyDictionary
+
+from git import Repo
+from git.exc import GitCommandError
+
+from .tree_index import get_tree_index
+
+log = logging.getLogger(__name__)
+
+MAX_PREFETCH_TIME = 30
+
+
+class ObjectReader(Protocol):
+    def read(self, oid: str) -> Optional[bytes]:
+        "Return the contents of a blob or None if it is missing"
+
+    def close(self):
+        pass
+
+
+class BlobReader:
+    """
+    Read blobs from the object database through one long-lived
+    `git cat-file --batch` process instead of checking files out.
+    """
+
+    def __init__(self, git_dir: str):
+        self.git_dir = git_dir
+        self.lock = threading.Lock()
+        self.proc: Optional[subprocess.Popen] = None
+
+    def _start(self) -> subprocess.Popen:
+        if self.proc is None:
+            self.proc = subprocess.Popen(
+                ["git", "cat-file", "--batch"],
+                cwd=self.git_dir,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        return self.proc
+
+    def read(self, oid: str) -> Optional[bytes]:
+        "Return the contents of a blob or None if it is missing"
+        with self.lock:
+            proc = self._start()
+            assert proc.stdin is not None and proc.stdout is not None
+
+            proc.stdin.write(f"{oid}\n".encode())
+            proc.stdin.flush()
+
+            header = proc.stdout.readline().decode()
+            if not header:
+                raise IOError(f"git cat-file exited while reading {oid}")
+
+            parts = header.split()
+            if len(parts) != 3:
+                # "<oid> missing" or "<oid> ambiguous"
+                return None
+            _oid, kind, size = parts
+            data = proc.stdout.read(int(size))
+            proc.stdout.read(1)  # trailing newline
+
+        if kind != "blob":
+            return None
+        return data
+
+    def close(self):
+        with self.lock:
+            if self.proc is None:
+                return
+            try:
+                if self.proc.stdin is not None:
+                    self.proc.stdin.close()
+                self.proc.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired) as e:
+                log.error(f"Error closing git cat-file: {e}")
+                self.proc.kill()
+            self.proc = None
+
+
+_readers: "WeakKeyDictionary[Repo, ObjectReader]" = WeakKeyDictionary()
+_readers_lock = threading.Lock()
+
+
+def attach_reader(repo: Repo, reader: ObjectReader):
+    "Serve file reads for this repo from `reader` instead of the working tree"
+    with _readers_lock:
+        _readers[repo] = reader
+
+
+def attach_blob_reader(repo: Repo) -> BlobReader:
+    "Serve file reads for this clone from the object database"
+    with _readers_lock:
+        reader = _readers.get(repo)
+        if not isinstance(reader, BlobReader):
+            reader = BlobReader(str(repo.git_dir))
+            _readers[repo] = reader
+        return reader
+
+
+def detach_blob_reader(repo: Repo):
+    with _readers_lock:
+        reader = _readers.pop(repo, None)
+    if reader is not None:
+        reader.close()
+
+
+def is_partial_clone(repo: Repo) -> bool:
+    try:
+        return repo.git.config("--get", "remote.origin.promisor") == "true"
+    except GitCommandError:
+        return False
+
+
+def prefetch_blobs(repo: Repo, paths: Iterable[str]):
+    """
+    Fetch the blobs for these repo-relative paths in a single round trip.
+
+    Only needed when reading blobs from a partial clone, otherwise git
+    would lazily fetch each missing blob one request at a time. This is
+    best effort, blobs that are still missing are fetched lazily.
+    """
+    if repo not in _readers or not is_partial_clone(repo):
+        return
+
+    index = get_tree_index(repo)
+    oids = sorted({index.oids[path] for path in paths if path in index.oids})
+    if not oids:
+        return
+
+    s = time.time()
+    cmd = [
+        "git",
+        "-c",
+        "fetch.negotiationAlgorithm=noop",
+        "fetch",
+        "origin",
+        "--no-tags",
+        "--no-write-fetch-head",
+        "--recurse-submodules=no",
+        "--filter=blob:none",
+        "--stdin",
+    ]
+    try:
+        proc = subprocess.run(
+            cmd,
+            cwd=repo.git_dir,
+            input="\n".join(oids).encode(),
+            capture_output=True,
+            timeout=MAX_PREFETCH_TIME,
+        )
+    except subprocess.TimeoutExpired:
+        log.error(f"Timeout prefetching {len(oids)} blobs")
+        return
+    if proc.returncode != 0:
+        log.error(f"Error prefetching blobs: {proc.returncode}: {proc.stderr!r}")
+        return
+    log.info(f"Prefetched {len(oids)} blobs in {time.time() - s:.2f} seconds")
+
+
+def open_repo_file(
+    repo: Repo,
+    full_path: str,
+    mode: str = "r",
+    encoding: Optional[str] = None,
+    errors: Optional[str] = None,
+) -> IO:
+    """
+    Open a file from the clone.
+
+    Reads from the working tree unless a blob reader is attached to the
+    repo, in which case the file is read from HEAD without a checkout.
+    """
+    reader = _readers.get(repo)
+    if reader is None:
+        return open(full_path, mode, encoding=encoding, errors=errors)
+
+    rel_path = os.path.relpath(full_path, repo.working_dir).replace(os.sep, "/")
+    oid = get_tree_index(repo).oids.get(rel_path)
+    data = reader.read(oid) if oid else None
+    if data is None:
+        raise FileNotFoundError(full_path)
+
+    if "b" in mode:
+        return io.BytesIO(data)
+    return io.TextIOWrapper(io.BytesIO(data), encoding=encoding, errors=errors)
@@ -0,0 +1,56 @@
+"""
+Generate the table of results for canonical license texts.
+
+Most license files are copies of a reference text that only differ in
+whitespace and copyright lines, these are identified by hash without
+running the matchers.
+
+    python -m score.git_vcs.canonical_licenses [LICENSE_FILE ...]
+
+Besides the reference licenses, any license files given on the command
+line are added to the table.
+"""
+
+import json
+import sys
+from dataclasses import asdict
+from pathlib import Path
+from typing import Iterable
+
+from .license_detection import (
+    MATCHER_VERSION,
+    canonical_key,
+    canonical_licenses_path,
+    license_dir,
+    match_license,
+)
+
+
+def read_license(path: Path) -> str:
+    # Read the same way as files in a repo
+    with open(path, encoding="utf8", errors="ignore") as f:
+        return f.read().strip()
+
+
+def build_table(paths: Iterable[Path]) -> dict:
+    licenses: dict[str, dict] = {}
+    for path in paths:
+        content = read_license(path)
+        licenses.setdefault(canonical_key(content), asdict(match_license(content)))
+    return {
+        "matcher_version": MATCHER_VERSION,
+        "licenses": dict(sorted(licenses.items())),
+    }
+
+
+def main():
+    paths = sorted(license_dir.iterdir()) + [Path(arg) for arg in sys.argv[1:]]
+    table = build_table(paths)
+    with open(canonical_licenses_path, "w") as f:
+        json.dump(table, f, indent=1, sort_keys=True)
+        f.write("\n")
+    print(f"Wrote {len(table['licenses'])} licenses to {canonical_licenses_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
+import fnmatch
 import logging
 import os
+import re
 import shutil
-import tempfile
 import time
 from contextlib import contextmanager
 from typing import Tuple
@@ -13,11 +14,23 @@ from git.exc import GitCommandError, UnsafeProtocolError
 from score.models import Source
 from score.notes import Note
 
+from .blob_reader import attach_blob_reader, detach_blob_reader
+from .clone_scheduler import CloneQueueTimeout, CloneTicket, clone_scheduler
+from .tree_index import forget_tree_index
+from .workspace import CloneTooLarge, check_size, clone_workspace, wait_within_limits
+
 log = logging.getLogger(__name__)
 
 
 MAX_CLONE_TIME = 30
 
+# "sparse-checkout" writes license and manifest files to the working tree
+# "no-checkout" reads them straight from the object database
+CLONE_MODES = ["sparse-checkout", "no-checkout"]
+CLONE_MODE = os.environ.get("SCORE_CLONE_MODE", "sparse-checkout")
+# Threads used by git to index the fetched pack of each clone
+CLONE_PACK_THREADS = int(os.environ.get("SCORE_CLONE_PACK_THREADS", "1"))
+
 NOT_A_LICENSE_FILE_EXT = [".json", ".csv", ".svg", ".jpg", ".jpeg"]
 LICENSE_PATTERNS = [
     "**/LICEN[CS]E",
@@ -29,6 +42,10 @@ LICENSE_PATTERNS = [
     "**/COPYING.*",
     "**/copying.*",
 ]
+# Matches the file name part of any of LICENSE_PATTERNS
+LICENSE_FILE_NAME = re.compile(
+    "|".join(fnmatch.translate(p.removeprefix("**/")) for p in LICENSE_PATTERNS)
+)
 
 sparse_checkout = """
 **/package.json
@@ -68,6 +85,8 @@ def git_command_error(
 
 def cleanup(repo: Repo | None, tmpdir: str | None):
     if repo is not None:
+        detach_blob_reader(repo)
+        forget_tree_index(repo)
         try:
             repo.close()
         except Exception as e:
@@ -83,42 +102,84 @@ def cleanup(repo: Repo | None, tmpdir: str | None):
 
 
 @contextmanager
-def clone_repo(url: str):
+def clone_repo(url: str, mode: str = CLONE_MODE, priority: int = 0):
+    """
+    Clone `url` into a temporary directory once the clone scheduler admits it.
+
+    Yields (repo, source), repo is None if the clone failed.
+    """
+    assert mode in CLONE_MODES, f"Invalid clone mode: '{mode}'"
+    try:
+        ticket = clone_scheduler.acquire(url, priority)
+    except CloneQueueTimeout as err:
+        log.warning(f"{err}")
+        yield None, Source(source_url=url, error=Note.NO_SOURCE_GIT_TIMEOUT)
+        return
+
+    try:
+        with clone_to_tmpdir(url, mode, ticket) as result:
+            yield result
+    finally:
+        clone_scheduler.release(ticket)
+
+
+@contextmanager
+def clone_to_tmpdir(url: str, mode: str, ticket: CloneTicket):
     log.info(f"Cloning {url}")
     source = Source(package_destinations=[], source_url=url)
     tmpdir = None
     repo = None
 
-    with tempfile.TemporaryDirectory(
-        prefix="score", suffix=".git", ignore_cleanup_errors=True
-    ) as tmpdir:
+    with clone_workspace() as tmpdir:
         try:
             s = time.time()
             mygit = Git(os.getcwd())
-            mygit.clone(
+            clone_process = mygit.clone(
                 Git.polish_url(url),
                 tmpdir,
                 single_branch=True,
                 no_checkout=True,
                 sparse=True,
                 filter="tree:0",
+                config=[f"pack.threads={CLONE_PACK_THREADS}"],
                 # depth=1,
                 # https://github.com/gitpython-developers/GitPython/issues/892
                 # See issue for why we cant use clone_from
-                kill_after_timeout=MAX_CLONE_TIME,
+                as_process=True,
+            )
+            # Charge the clone for what it uses so far, the reservation is
+            # only a lower bound
+            wait_within_limits(
+                clone_process.proc,
+                clone_process.args,
+                tmpdir,
+                MAX_CLONE_TIME,
+                on_size=lambda size: clone_scheduler.update_usage(
+                    ticket, max(size, clone_scheduler.reservation)
+                ),
             )
             repo = Repo(tmpdir)
             log.info(f"Cloned to {tmpdir} in {time.time() - s:.2f} seconds")
 
-            repo.git.execute(["git", "sparse-checkout", "init", "--no-cone"])
+            if mode == "no-checkout":
+                attach_blob_reader(repo)
+            else:
+                repo.git.execute(["git", "sparse-checkout", "init", "--no-cone"])
 
-            with open(f"{repo.git_dir}/info/sparse-checkout", "w") as fp:
-                fp.write(sparse_checkout)
+                with open(f"{repo.git_dir}/info/sparse-checkout", "w") as fp:
+                    fp.write(sparse_checkout)
 
-            s = time.time()
-            repo.git.checkout("HEAD")
-            log.info(f"Checked out in {time.time() - s:.2f} seconds")
+                s = time.time()
+                repo.git.checkout("HEAD")
+                log.info(f"Checked out in {time.time() - s:.2f} seconds")
 
+            clone_scheduler.update_usage(ticket, check_size(tmpdir))
+
+        except CloneTooLarge as err:
+            log.warning(f"{url}: {err}")
+            source.error = Note.NO_SOURCE_REPO_TOO_LARGE
+            cleanup(repo, None)
+            repo = None
         except UnsafeProtocolError:
             source.error = Note.NO_SOURCE_UNSAFE_GIT_PROTOCOL
             repo = None
@@ -0,0 +1,165 @@
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator
+
+log = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+# Number of clones that may run at the same time on this instance
+MAX_CONCURRENT_CLONES = int(os.environ.get("SCORE_MAX_CONCURRENT_CLONES", "4"))
+# Seconds a clone may wait in the queue before giving up
+CLONE_QUEUE_TIMEOUT = float(os.environ.get("SCORE_CLONE_QUEUE_TIMEOUT", "60"))
+# Total size of all temporary clones on disk
+CLONE_DISK_BUDGET = int(os.environ.get("SCORE_CLONE_DISK_BUDGET_MB", "2048")) * MB
+# Disk reserved for a clone until it has grown beyond it, clones report
+# their size while git runs
+CLONE_DISK_RESERVATION = int(os.environ.get("SCORE_CLONE_RESERVATION_MB", "100")) * MB
+
+
+class CloneQueueTimeout(TimeoutError):
+    pass
+
+
+@dataclass
+class CloneTicket:
+    url: str
+    priority: int
+    enqueued: float
+    reserved: int
+
+
+class CloneScheduler:
+    """
+    Admit clones in priority then FIFO order while bounding the number of
+    concurrent clones and the disk used by temporary clones.
+
+    Lower priority values are admitted first.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = MAX_CONCURRENT_CLONES,
+        queue_timeout: float = CLONE_QUEUE_TIMEOUT,
+        disk_budget: int = CLONE_DISK_BUDGET,
+        reservation: int = CLONE_DISK_RESERVATION,
+    ):
+        assert max_concurrent > 0, "max_concurrent must be positive"
+        self.max_concurrent = max_concurrent
+        self.queue_timeout = queue_timeout
+        self.disk_budget = disk_budget
+        self.reservation = reservation
+
+        self.cond = threading.Condition()
+        self.queue: list[tuple[int, int, CloneTicket]] = []
+        self.counter = itertools.count()
+        self.active = 0
+        self.disk_used = 0
+
+        # Metrics
+        self.admitted = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _can_admit(self, ticket: CloneTicket) -> bool:
+        if self.queue[0][2] is not ticket:
+            return False
+        if self.active >= self.max_concurrent:
+            return False
+        # Always let one clone run so a large repo can not starve the queue
+        if self.active > 0 and self.disk_used + ticket.reserved > self.disk_budget:
+            return False
+        return True
+
+    def acquire(self, url: str, priority: int = 0) -> CloneTicket:
+        ticket = CloneTicket(
+            url=url,
+            priority=priority,
+            enqueued=time.monotonic(),
+            reserved=self.reservation,
+        )
+        entry = (priority, next(self.counter), ticket)
+        deadline = ticket.enqueued + self.queue_timeout
+
+        with self.cond:
+            heapq.heappush(self.queue, entry)
+            while not self._can_admit(ticket):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.queue.remove(entry)
+                    heapq.heapify(self.queue)
+                    self.timeouts += 1
+                    self.cond.notify_all()
+                    raise CloneQueueTimeout(
+                        f"Waited {self.queue_timeout}s for a clone slot for {url}"
+                    )
+                self.cond.wait(remaining)
+
+            heapq.heappop(self.queue)
+            self.active += 1
+            self.disk_used += ticket.reserved
+
+            wait = time.monotonic() - ticket.enqueued
+            self.admitted += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            queue_depth = len(self.queue)
+            active = self.active
+            # The next clone in line may fit as well
+            self.cond.notify_all()
+
+        log.info(
+            f"Clone slot for {url} after waiting {wait:.2f} seconds",
+            extra={
+                "clone_queue_wait": wait,
+                "clone_queue_depth": queue_depth,
+                "clone_active": active,
+            },
+        )
+        return ticket
+
+    def update_usage(self, ticket: CloneTicket, size: int):
+        "Replace the reservation for this clone with its measured size"
+        with self.cond:
+            self.disk_used += size - ticket.reserved
+            ticket.reserved = size
+            self.cond.notify_all()
+
+    def release(self, ticket: CloneTicket):
+        with self.cond:
+            self.active -= 1
+            self.disk_used -= ticket.reserved
+            ticket.reserved = 0
+            self.cond.notify_all()
+
+    @contextmanager
+    def slot(self, url: str, priority: int = 0) -> Iterator[CloneTicket]:
+        ticket = self.acquire(url, priority)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def stats(self) -> dict:
+        with self.cond:
+            return {
+                "queue_depth": len(self.queue),
+                "active": self.active,
+                "max_concurrent": self.max_concurrent,
+                "disk_used": self.disk_used,
+                "disk_budget": self.disk_budget,
+                "admitted": self.admitted,
+                "timeouts": self.timeouts,
+                "mean_wait": self.total_wait / self.admitted if self.admitted else 0.0,
+                "max_wait": self.max_wait,
+            }
+
+
+clone_scheduler = CloneScheduler()
@@ -0,0 +1,84 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Iterable, Optional, Tuple
+
+SECONDS_PER_DAY = 60 * 60 * 24
+MONTHLY_WINDOW_DAYS = 30
+
+# (author email, authored unix timestamp)
+Commit = Tuple[str, int]
+
+
+def to_naive_utc(timestamp: int) -> datetime:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).replace(tzinfo=None)
+
+
+def daily_author_counts(commits: Iterable[Commit]) -> list[Tuple[int, int]]:
+    """
+    Count the unique authors per UTC day.
+
+    Returns a list of (day number since the epoch, unique author count)
+    sorted by day. Days without commits are omitted.
+    """
+    authors_by_day: dict[int, set[str]] = defaultdict(set)
+    for email, when in commits:
+        authors_by_day[when // SECONDS_PER_DAY].add(email)
+
+    return sorted((day, len(emails)) for day, emails in authors_by_day.items())
+
+
+def max_rolling_authors(
+    commits: Iterable[Commit], window_days: int = MONTHLY_WINDOW_DAYS
+) -> Optional[int]:
+    """
+    Maximum over time of the sum of daily unique authors in a sliding window
+    of `window_days` days.
+
+    This is equivalent to resampling the commits daily with `nunique`,
+    taking a `rolling(f"{window_days}D").sum()` and then the `max()`.
+    Days without commits contribute zero, so only windows ending on a
+    commit day need to be considered. Returns None if there are no commits.
+    """
+    days = daily_author_counts(commits)
+    if not days:
+        return None
+
+    best = 0
+    window_sum = 0
+    start = 0
+    for day, count in days:
+        window_sum += count
+        while days[start][0] <= day - window_days:
+            window_sum -= days[start][1]
+            start += 1
+        best = max(best, window_sum)
+
+    return best
+
+
+def is_bot_email(email: str) -> bool:
+    # Filter out commits from GitHub's email domain
+    return email.endswith("github.com")
+
+
+def summarize_commits(commits: Iterable[Commit], one_year_ago: datetime) -> dict:
+    human_commits = [
+        (email, when) for email, when in commits if not is_bot_email(email)
+    ]
+
+    # Timestamps are compared as naive UTC datetimes
+    recent_cutoff = one_year_ago.replace(tzinfo=timezone.utc).timestamp()
+    recent_authors = {email for email, when in human_commits if when > recent_cutoff}
+
+    first_commit = None
+    latest_commit = None
+    if human_commits:
+        first_commit = to_naive_utc(min(when for _, when in human_commits))
+        latest_commit = to_naive_utc(max(when for _, when in human_commits))
+
+    return {
+        "recent_authors_count": len(recent_authors),
+        "max_monthly_authors_count": max_rolling_authors(human_commits),
+        "first_commit": first_commit,
+        "latest_commit": latest_commit,
+    }
@@ -0,0 +1,228 @@
+import base64
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterator, Optional, Tuple, cast
+from urllib.parse import quote, urlparse
+
+import requests
+from git import Repo
+
+from ..utils.normalize_source_url import normalize_source_url
+from ..utils.request_session import get_session
+from .blob_reader import attach_reader, detach_blob_reader
+from .commit_stats import Commit
+from .tree_index import TreeIndex, forget_tree_index, set_tree_index
+
+log = logging.getLogger(__name__)
+
+# Read github.com and gitlab.com repos through their APIs instead of cloning
+FORGE_FAST_PATH = os.environ.get("SCORE_FORGE_FAST_PATH", "0") == "1"
+GITHUB_API_URL = os.environ.get("SCORE_GITHUB_API_URL", "https://api.github.com")
+GITHUB_TOKEN = os.environ.get("SCORE_GITHUB_TOKEN")
+GITLAB_API_URL = os.environ.get("SCORE_GITLAB_API_URL", "https://gitlab.com/api/v4")
+GITLAB_TOKEN = os.environ.get("SCORE_GITLAB_TOKEN")
+# Repos with a longer history than this are cloned
+MAX_PAGES = int(os.environ.get("SCORE_FORGE_MAX_PAGES", "10"))
+
+PAGE_SIZE = 100
+FORGE_TIMEOUT = 10
+
+
+class ForgeUnavailable(Exception):
+    "The forge can not provide everything a clone would"
+
+
+@dataclass
+class ForgeSnapshot:
+    head_sha: str
+    # (path, blob sha) of every file at head_sha
+    entries: list[Tuple[str, str]]
+    # Every commit reachable from head_sha
+    commits: list[Commit]
+
+
+@contextmanager
+def parsing(what: str) -> Iterator[None]:
+    "Turn errors from an unexpected API response into ForgeUnavailable"
+    try:
+        yield
+    except (ValueError, KeyError, TypeError) as err:
+        raise ForgeUnavailable(f"{what}: unexpected response: {err!r}") from err
+
+
+def parse_timestamp(value: str) -> int:
+    return int(datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp())
+
+
+class ForgeClient(ABC):
+    def __init__(self, owner: str, name: str, api_url: str, token: Optional[str]):
+        self.owner = owner
+        self.name = name
+        self.api_url = api_url.rstrip("/")
+        self.session = get_session()
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+
+    def get(self, path: str, **params) -> requests.Response:
+        url = f"{self.api_url}/{path}"
+        try:
+            res = self.session.get(url, params=params, timeout=FORGE_TIMEOUT)
+        except requests.RequestException as err:
+            raise ForgeUnavailable(f"{url}: {err}") from err
+
+        if res.status_code in (403, 429):
+            log.warning(f"Rate limited by {self.api_url}: {res.status_code}")
+            raise ForgeUnavailable(f"{url}: rate limited")
+        if res.status_code != 200:
+            raise ForgeUnavailable(f"{url}: {res.status_code}")
+        return res
+
+    def get_pages(self, path: str, **params) -> Iterator[dict]:
+        for page in range(1, MAX_PAGES + 1):
+            items = self.get(path, per_page=PAGE_SIZE, page=page, **params).json()
+            yield from items
+            if len(items) < PAGE_SIZE:
+                return
+        raise ForgeUnavailable(f"{path}: more than {MAX_PAGES} pages")
+
+    @abstractmethod
+    def snapshot(self) -> ForgeSnapshot:
+        "The default branch head, its files and its history"
+
+    @abstractmethod
+    def read(self, oid: str) -> Optional[bytes]:
+        "The content of the blob `oid`"
+
+    def close(self):
+        self.session.close()
+
+
+class GitHubClient(ForgeClient):
+    def snapshot(self) -> ForgeSnapshot:
+        repo = f"repos/{self.owner}/{self.name}"
+        with parsing(repo):
+            branch = self.get(repo).json()["default_branch"]
+
+            commits: list[Commit] = []
+            head_sha = None
+            for item in self.get_pages(f"{repo}/commits", sha=branch):
+                head_sha = head_sha or item["sha"]
+                author = item["commit"]["author"]
+                commits.append(
+                    (author.get("email") or "", parse_timestamp(author["date"]))
+                )
+            if head_sha is None:
+                raise ForgeUnavailable(f"{repo}: no commits")
+
+            tree = self.get(f"{repo}/git/trees/{head_sha}", recursive=1).json()
+            if tree.get("truncated"):
+                raise ForgeUnavailable(f"{repo}: tree is truncated")
+            entries = [
+                (item["path"], item["sha"])
+                for item in tree["tree"]
+                if item["type"] == "blob"
+            ]
+            return ForgeSnapshot(head_sha=head_sha, entries=entries, commits=commits)
+
+    def read(self, oid: str) -> Optional[bytes]:
+        path = f"repos/{self.owner}/{self.name}/git/blobs/{oid}"
+        with parsing(path):
+            data = self.get(path).json()
+            if data.get("encoding") != "base64":
+                raise ForgeUnavailable(f"Blob {oid} is not base64 encoded")
+            return base64.b64decode(data["content"])
+
+
+class GitLabClient(ForgeClient):
+    @property
+    def project(self) -> str:
+        return f"projects/{quote(f'{self.owner}/{self.name}', safe='')}"
+
+    def snapshot(self) -> ForgeSnapshot:
+        with parsing(self.project):
+            branch = self.get(self.project).json()["default_branch"]
+
+            commits: list[Commit] = []
+            head_sha = None
+            for item in self.get_pages(
+                f"{self.project}/repository/commits", ref_name=branch
+            ):
+                head_sha = head_sha or item["id"]
+                commits.append(
+                    (
+                        item.get("author_email") or "",
+                        parse_timestamp(item["authored_date"]),
+                    )
+                )
+            if head_sha is None:
+                raise ForgeUnavailable(f"{self.project}: no commits")
+
+            entries = [
+                (item["path"], item["id"])
+                for item in self.get_pages(
+                    f"{self.project}/repository/tree", ref=head_sha, recursive="true"
+                )
+                if item["type"] == "blob"
+            ]
+            return ForgeSnapshot(head_sha=head_sha, entries=entries, commits=commits)
+
+    def read(self, oid: str) -> Optional[bytes]:
+        return self.get(f"{self.project}/repository/blobs/{oid}/raw").content
+
+
+def get_forge_client(url: str, api_url: Optional[str] = None) -> Optional[ForgeClient]:
+    "A client for the forge hosting `url` or None if it is not supported"
+    normalized = normalize_source_url(url)
+    if normalized is None:
+        return None
+    URL = urlparse(normalized)
+    if URL.hostname not in ("github.com", "gitlab.com"):
+        return None
+    owner, name = URL.path.strip("/").split("/")
+
+    if URL.hostname == "github.com":
+        return GitHubClient(owner, name, api_url or GITHUB_API_URL, GITHUB_TOKEN)
+    return GitLabClient(owner, name, api_url or GITLAB_API_URL, GITLAB_TOKEN)
+
+
+class ForgeRepo:
+    """
+    Stands in for a clone. The scrapers only use `working_dir`, the tree
+    index and the file reader, which are served from the forge API.
+    """
+
+    def __init__(self, working_dir: str):
+        self.working_dir = working_dir
+
+
+@contextmanager
+def forge_checkout(client: ForgeClient) -> Iterator[Tuple[Repo, ForgeSnapshot]]:
+    """
+    Yield a repo that the clone based scrapers can read files from.
+
+    Raises ForgeUnavailable if the forge can not provide the data.
+    """
+    s = time.time()
+    try:
+        snapshot = client.snapshot()
+    except ForgeUnavailable:
+        client.close()
+        raise
+    log.info(
+        f"Read {len(snapshot.entries)} files and {len(snapshot.commits)} commits "
+        f"from {client.api_url} in {time.time() - s:.2f} seconds"
+    )
+
+    repo = cast(Repo, ForgeRepo(f"/forge/{client.owner}/{client.name}"))
+    set_tree_index(repo, TreeIndex(snapshot.entries))
+    attach_reader(repo, client)
+    try:
+        yield repo, snapshot
+    finally:
+        detach_blob_reader(repo)
+        forget_tree_index(repo)
@@ -1,23 +1,46 @@
+import json
+import logging
+import os
 import re
-from dataclasses import replace
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, replace
 from difflib import unified_diff
 from functools import lru_cache
 from hashlib import md5, sha256
 from pathlib import Path
-from typing import Union
+from typing import Callable, Optional, Tuple, Union
 
-import pandas as pd
+import numpy as np
 from cachetools import LRUCache, cached
 from spdx_license_matcher.find import find_license
-from strsimpy import SorensenDice
 
 from score.models import License
+from score.utils.caching import (
+    cache_path,
+    load_many_from_cache,
+    save_text_to_cache,
+    save_to_cache,
+)
 from score.utils.license_name_to_kind import KIND_MAP
 from score.utils.normalize_license_content import normalize_license_content
 
+from .minhash import MinHashLSH, dice_to_jaccard
+
+log = logging.getLogger(__name__)
+
+# Bump when a change to the matching gives different results for the same text
+MATCHER_VERSION = 2
+
 CLOSE_ENOUGH = 0.95
 PROBABLY_NOT = 0.9
 
+# Probability that the MinHash index finds a reference with PROBABLY_NOT
+# similarity to the license
+LSH_RECALL = float(os.environ.get("SCORE_LICENSE_LSH_RECALL", "0.99"))
+# Below this many references a full scan is faster than the index
+LSH_MIN_REFERENCES = int(os.environ.get("SCORE_LICENSE_LSH_MIN_REFERENCES", "500"))
+
 
 def normalize(content: str) -> str:
     content = "\n".join(
@@ -37,18 +60,173 @@ def normalize(content: str) -> str:
     return content.lower().strip()
 
 
-def identify_license(
-    source_url: str, license_content: str, license_file_path: str
-) -> License:
-    license = identify_license_cached(license_content)
-    return replace(license, path=license_file_path)
+def content_hash(license_content: str) -> str:
+    return sha256(license_content.encode("utf-8")).hexdigest()
+
+
+def normalized_md5(license_content: str) -> str:
+    "The hash used for License.md5, the same for whitespace-only changes"
+    return md5(normalize_license_content(license_content).encode("utf-8")).hexdigest()
+
+
+def canonical_key(license_content: str) -> str:
+    """
+    Key of the table of canonical license texts, the same for any
+    copyright holder and year
+    """
+    return normalized_md5(
+        "\n".join(
+            line for line in license_content.splitlines() if not copyright_line(line)
+        )
+    )
+
+
+def license_cache_path(content_sha256: str) -> str:
+    return cache_path(f"license/v{MATCHER_VERSION}/{content_sha256}.json")
+
 
+# Results by content_hash for this process
+license_cache: LRUCache = LRUCache(10_000, getsizeof=lambda x: 1)
 
-@cached(
-    LRUCache(10_000, getsizeof=lambda x: 1),
-    key=lambda content: sha256(content.encode("utf-8")).hexdigest(),
+
+# Writes to the shared cache, these do not hold up the request
+LICENSE_CACHE_WRITERS = int(os.environ.get("SCORE_LICENSE_CACHE_WRITERS", "8"))
+cache_writes = ThreadPoolExecutor(
+    max_workers=LICENSE_CACHE_WRITERS, thread_name_prefix="license-cache"
 )
+pending_writes: set[Future] = set()
+pending_writes_lock = threading.Lock()
+
+
+@cached(license_cache, key=content_hash)
 def identify_license_cached(license_content: str) -> License:
+    """
+    Identify a license, checking the table of canonical license texts,
+    then this process and then the shared cache that all instances
+    write to.
+    """
+    known = find_known_licenses([license_content])
+    if license_content not in known:
+        known = remember_licenses({license_content: match_license(license_content)})
+    return known[license_content]
+
+
+def find_known_licenses(contents: list[str]) -> dict[str, License]:
+    """
+    The results for canonical license texts and ones already in the shared
+    cache, which is read in one batch. Contents without a result are left
+    out, they have to be matched.
+    """
+    table = get_canonical_licenses()
+    known = {}
+    modified = {}
+    uncached = {}
+    for content in contents:
+        canonical = table.get(canonical_key(content))
+        if canonical is None:
+            uncached[license_cache_path(content_hash(content))] = content
+        elif canonical.content_sha256 is None:
+            known[content] = canonical
+        else:
+            # The copyright lines and whitespace may differ from the text in
+            # the table
+            modified[content] = replace(canonical, md5=normalized_md5(content))
+    known.update(save_licenses_content(modified))
+
+    # A miss or a backend error, the license is matched again
+    for path, license in load_many_from_cache(License, list(uncached)).items():
+        known[uncached[path]] = license
+    return known
+
+
+def remember_licenses(licenses: dict[str, License]) -> dict[str, License]:
+    """
+    Share the results of match_license with other instances. The results
+    are saved in the background, the contents of modified licenses are
+    saved first because their content_sha256 depends on it.
+    """
+    licenses = {
+        **licenses,
+        **save_licenses_content(
+            {
+                content: license
+                for content, license in licenses.items()
+                if license.content_sha256 is not None
+            }
+        ),
+    }
+    for content, license in licenses.items():
+        submit_write(save_to_cache, license, license_cache_path(content_hash(content)))
+    return licenses
+
+
+def submit_write(fn: Callable[..., None], *args) -> Future:
+    "Run a write to the shared cache in the background, logging its errors"
+
+    def write():
+        try:
+            fn(*args)
+        except Exception:
+            log.exception("Failed to save to cache")
+
+    future = cache_writes.submit(write)
+    with pending_writes_lock:
+        pending_writes.add(future)
+    future.add_done_callback(discard_write)
+    return future
+
+
+def discard_write(future: Future):
+    with pending_writes_lock:
+        pending_writes.discard(future)
+
+
+def wait_for_writes():
+    "Wait until the writes submitted so far are done"
+    with pending_writes_lock:
+        writes = list(pending_writes)
+    wait(writes)
+
+
+def license_content_path(content_sha256: str) -> str:
+    return cache_path(f"license-content/{content_sha256}.txt")
+
+
+def save_licenses_content(licenses: dict[str, License]) -> dict[str, License]:
+    "save_license_content for each of `licenses` keyed by content, concurrently"
+    saved = cache_writes.map(
+        lambda item: save_license_content(item[1], item[0]), licenses.items()
+    )
+    return dict(zip(licenses, saved))
+
+
+def save_license_content(license: License, license_content: str) -> License:
+    "Keep the content of a modified license so that its diff can be built later"
+    content_sha256 = content_hash(license_content)
+    try:
+        saved = save_text_to_cache(
+            license_content, license_content_path(content_sha256)
+        )
+    except Exception:
+        log.exception("Failed to save license content to cache")
+        saved = False
+    # Without the content there is nothing to build the diff from
+    return replace(license, content_sha256=content_sha256 if saved else None)
+
+
+def license_diff(reference: str, license_content: str) -> str:
+    "Changes from the `reference` license text to `license_content`"
+    return "\n".join(
+        unified_diff(
+            get_all_licenses()[reference].splitlines(),
+            license_content.splitlines(),
+            fromfile=f"https://opensource.org/license/{reference}",
+            tofile="LICENSE",
+        )
+    )
+
+
+def match_license(license_content: str) -> License:
 
     spdx_licenses = find_license(license_content)
     if spdx_licenses:
@@ -75,22 +253,9 @@ def identify_license_cached(license_content: str) -> License:
         )
 
     normalized_license_content = normalize(license_content)
-    all_licenses = get_all_licenses()
-    sd = SorensenDice()
-    similarities_lst = []
-    for license_name, ref_license in all_licenses.items():
-        similarities_lst.append(
-            {
-                "name": license_name,
-                "similarity": sd.similarity(
-                    normalized_license_content,
-                    normalize(ref_license),
-                ),
-            }
-        )
-    similarities = pd.DataFrame(similarities_lst).set_index("name")
-    best_match = similarities.idxmax().item()
-    similarity: float = similarities.loc[best_match, "similarity"].item()  # type: ignore
+    best_match, similarity = get_reference_matcher().best_match(
+        normalized_license_content, shingles(normalized_license_content)
+    )
     if similarity < PROBABLY_NOT:
         return License(
             license="Unknown",
@@ -104,18 +269,7 @@ def identify_license_cached(license_content: str) -> License:
     kind = KIND_MAP.get(best_match, best_match)
 
     modified = True
-    diff = "\n".join(
-        unified_diff(
-            all_licenses[best_match].splitlines(),
-            license_content.splitlines(),
-            fromfile=f"https://opensource.org/license/{best_match}",
-            tofile="LICENSE",
-        )
-    )
-
-    md5hash = md5(
-        normalize_license_content(license_content).encode("utf-8")
-    ).hexdigest()
+    md5hash = normalized_md5(license_content)
 
     matched = License(
         license=best_match,
@@ -123,13 +277,121 @@ def identify_license_cached(license_content: str) -> License:
         kind=kind,
         similarity=similarity,
         modified=modified,
-        diff=diff,
         md5=md5hash,
+        # The diff is built on request from the reference and the content
+        content_sha256=content_hash(license_content),
     )
     return matched
 
 
 license_dir = Path(__file__).parent / "licenses"
+canonical_licenses_path = Path(__file__).parent / "canonical_licenses.json"
+
+# Shingle size used by strsimpy's SorensenDice
+SHINGLE_SIZE = 3
+
+_SPACE_PATTERN = re.compile(r"\s+")
+
+
+@dataclass(frozen=True)
+class ReferenceProfile:
+    # normalize() applied to the reference license text
+    text: str
+    shingles: frozenset[str]
+
+
+def shingles(text: str, k: int = SHINGLE_SIZE) -> frozenset[str]:
+    "The distinct k-shingles of `text`, as in strsimpy's ShingleBased.get_profile"
+    text = _SPACE_PATTERN.sub(" ", text)
+    return frozenset(text[i : i + k] for i in range(len(text) - k + 1))
+
+
+class ReferenceMatcher:
+    """
+    Score a license against every reference at once.
+
+    The references are stored as a binary shingle x reference matrix, so
+    the intersections with all references are a single sum over the rows
+    of the input's shingles. Gives the same similarities as strsimpy's
+    SorensenDice.
+
+    With `use_lsh`, a MinHash index first narrows the references down to
+    those likely to be above `threshold`.
+    """
+
+    def __init__(
+        self,
+        profiles: dict[str, ReferenceProfile],
+        use_lsh: bool = False,
+        threshold: float = PROBABLY_NOT,
+        recall: float = LSH_RECALL,
+    ):
+        self.names = list(profiles)
+        self.threshold = threshold
+        # Identical texts are a match even if they are too short for shingles
+        self.by_text: dict[str, list[int]] = {}
+        for column, profile in enumerate(profiles.values()):
+            self.by_text.setdefault(profile.text, []).append(column)
+        self.vocabulary: dict[str, int] = {}
+        for profile in profiles.values():
+            for shingle in profile.shingles:
+                self.vocabulary.setdefault(shingle, len(self.vocabulary))
+
+        self.matrix = np.zeros((len(self.vocabulary), len(self.names)), dtype=np.uint8)
+        for column, profile in enumerate(profiles.values()):
+            rows = [self.vocabulary[shingle] for shingle in profile.shingles]
+            self.matrix[rows, column] = 1
+        self.sizes = self.matrix.sum(axis=0, dtype=np.int64)
+
+        self.lsh = None
+        if use_lsh:
+            self.lsh = MinHashLSH(dice_to_jaccard(threshold), recall)
+            for column, profile in enumerate(profiles.values()):
+                self.lsh.add(column, profile.shingles)
+
+    def similarities(
+        self, text: str, shingles: frozenset[str], columns: Optional[list[int]] = None
+    ) -> np.ndarray:
+        """
+        Similarity of normalized `text` with its `shingles` to each
+        reference, or to the references in `columns`
+        """
+        rows = [self.vocabulary[s] for s in shingles if s in self.vocabulary]
+        exact = self.by_text.get(text, [])
+        if columns is None:
+            intersections = self.matrix[rows].sum(axis=0, dtype=np.int64)
+            sizes = self.sizes
+        else:
+            intersections = self.matrix[np.ix_(rows, columns)].sum(
+                axis=0, dtype=np.int64
+            )
+            sizes = self.sizes[columns]
+            exact = [i for i, column in enumerate(columns) if column in exact]
+
+        totals = sizes + len(shingles)
+        similarities = np.divide(
+            2.0 * intersections,
+            totals,
+            out=np.zeros(len(totals)),
+            where=totals > 0,
+        )
+        similarities[exact] = 1.0
+        return similarities
+
+    def best_match(self, text: str, shingles: frozenset[str]) -> Tuple[str, float]:
+        if self.lsh is not None:
+            candidates = self.lsh.query(shingles)
+            if candidates:
+                similarities = self.similarities(text, shingles, candidates)
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    return self.names[candidates[best]], float(similarities[best])
+            # Nothing close, scan everything to report the closest reference
+
+        similarities = self.similarities(text, shingles)
+        # First maximum wins, as with idxmax
+        best = int(np.argmax(similarities))
+        return self.names[best], float(similarities[best])
 
 
 def copyright_line(line: Union[bytes, str]):
@@ -146,6 +408,38 @@ def copyright_line(line: Union[bytes, str]):
     return bool(re.search(pattern, line.strip()))
 
 
+@lru_cache
+def get_reference_profiles() -> dict[str, ReferenceProfile]:
+    "Normalized reference licenses and their shingles, computed once per process"
+    profiles = {}
+    for license_name, ref_license in get_all_licenses().items():
+        text = normalize(ref_license)
+        profiles[license_name] = ReferenceProfile(text=text, shingles=shingles(text))
+    return profiles
+
+
+@lru_cache
+def get_canonical_licenses() -> dict[str, License]:
+    """
+    Results for known license texts keyed by canonical_key, generated
+    with `python -m score.git_vcs.canonical_licenses`
+    """
+    with open(canonical_licenses_path) as f:
+        data = json.load(f)
+    if data["matcher_version"] != MATCHER_VERSION:
+        log.warning(f"Ignoring {canonical_licenses_path}, it needs to be regenerated")
+        return {}
+    return {
+        md5hash: License(**license) for md5hash, license in data["licenses"].items()
+    }
+
+
+@lru_cache
+def get_reference_matcher() -> ReferenceMatcher:
+    profiles = get_reference_profiles()
+    return ReferenceMatcher(profiles, use_lsh=len(profiles) >= LSH_MIN_REFERENCES)
+
+
 @lru_cache
 def get_all_licenses():
     licenses = {}
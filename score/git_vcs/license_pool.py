@@ -0,0 +1,104 @@
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from spdx_license_matcher.find import find_license
+
+from score.models import License
+
+from .license_detection import (
+    content_hash,
+    find_known_licenses,
+    get_reference_matcher,
+    license_cache,
+    match_license,
+    remember_licenses,
+)
+
+log = logging.getLogger(__name__)
+
+# Processes used to match licenses, 0 matches them in the calling thread
+LICENSE_WORKERS = int(os.environ.get("SCORE_LICENSE_WORKERS", "0"))
+# Licenses sent to a worker at a time
+LICENSE_BATCH_SIZE = int(os.environ.get("SCORE_LICENSE_BATCH_SIZE", "16"))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def warm_up():
+    "Load the license matchers once per worker instead of on its first license"
+    find_license("MIT License")
+    get_reference_matcher()
+
+
+def get_license_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    if LICENSE_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=LICENSE_WORKERS,
+                # Forking a process with running threads is not safe
+                mp_context=multiprocessing.get_context("forkserver"),
+                initializer=warm_up,
+            )
+        return _pool
+
+
+def reset_license_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def match_licenses(contents: list[str]) -> list[License]:
+    "match_license for each of `contents`, in the license pool if there is one"
+    pool = get_license_pool()
+    if pool is None:
+        return [match_license(content) for content in contents]
+
+    s = time.time()
+    try:
+        licenses = list(pool.map(match_license, contents, chunksize=LICENSE_BATCH_SIZE))
+    except BrokenProcessPool:
+        log.error("License pool is broken, matching in process")
+        reset_license_pool()
+        return [match_license(content) for content in contents]
+    log.info(f"Matched {len(contents)} licenses in {time.time() - s:.2f} seconds")
+    return licenses
+
+
+def identify_licenses(contents: list[str]) -> list[License]:
+    """
+    identify_license_cached for all license files of a repo.
+
+    Known licenses are resolved in this process, the rest are matched as
+    one batch so that the GIL is not held while matching.
+    """
+    results: dict[str, License] = {}
+    uncached = []
+    for content in dict.fromkeys(contents):
+        license = license_cache.get(content_hash(content))
+        if license is None:
+            uncached.append(content)
+        else:
+            results[content] = license
+
+    # One round trip to the shared cache for the whole repo
+    results.update(find_known_licenses(uncached))
+    unknown = [content for content in uncached if content not in results]
+    if unknown:
+        results.update(remember_licenses(dict(zip(unknown, match_licenses(unknown)))))
+
+    for content in uncached:
+        license_cache[content_hash(content)] = results[content]
+    return [results[content] for content in contents]
@@ -0,0 +1,73 @@
+import zlib
+from collections import defaultdict
+from typing import Iterable, Tuple
+
+import numpy as np
+
+# Universal hashing (a * x + b) % PRIME, small enough that a * x fits in 64 bits
+PRIME = (1 << 31) - 1
+
+
+def dice_to_jaccard(dice: float) -> float:
+    return dice / (2 - dice)
+
+
+def candidate_probability(jaccard: float, bands: int, rows: int) -> float:
+    "Probability that two sets with this Jaccard similarity share a band"
+    return 1 - (1 - jaccard**rows) ** bands
+
+
+def choose_bands(num_perm: int, threshold: float, recall: float) -> Tuple[int, int]:
+    """
+    The (bands, rows) split of the signature with the fewest false
+    candidates that still finds pairs at `threshold` Jaccard similarity
+    with probability `recall`.
+    """
+    for rows in range(num_perm, 0, -1):
+        bands = num_perm // rows
+        if candidate_probability(threshold, bands, rows) >= recall:
+            return bands, rows
+    return num_perm, 1
+
+
+class MinHashLSH:
+    """
+    Find the sets that are likely to have a Jaccard similarity above a
+    threshold with a query set, without comparing it to every set.
+    """
+
+    def __init__(
+        self, threshold: float, recall: float, num_perm: int = 128, seed: int = 1
+    ):
+        self.bands, self.rows = choose_bands(num_perm, threshold, recall)
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, PRIME, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, PRIME, num_perm, dtype=np.uint64)
+        self.buckets: list[dict[bytes, list[int]]] = [
+            defaultdict(list) for _ in range(self.bands)
+        ]
+
+    def signature(self, items: Iterable[str]) -> np.ndarray:
+        hashes = np.fromiter(
+            (zlib.crc32(item.encode()) % PRIME for item in items), dtype=np.uint64
+        )
+        if not len(hashes):
+            return np.full(len(self.a), PRIME, dtype=np.uint64)
+        permuted = (np.outer(self.a, hashes) + self.b[:, None]) % PRIME
+        return permuted.min(axis=1)
+
+    def bands_of(self, signature: np.ndarray) -> Iterable[Tuple[int, bytes]]:
+        for band in range(self.bands):
+            start = band * self.rows
+            yield band, signature[start : start + self.rows].tobytes()
+
+    def add(self, key: int, items: Iterable[str]):
+        for band, bucket in self.bands_of(self.signature(items)):
+            self.buckets[band][bucket].append(key)
+
+    def query(self, items: Iterable[str]) -> list[int]:
+        "Keys that share at least one band with `items`, in insertion order"
+        candidates: set[int] = set()
+        for band, bucket in self.bands_of(self.signature(items)):
+            candidates.update(self.buckets[band].get(bucket, ()))
+        return sorted(candidates)
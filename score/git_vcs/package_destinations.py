@@ -8,6 +8,9 @@ from typing import Iterable, Optional, Tuple
 import tomli
 from git import Repo
 
+from .blob_reader import open_repo_file
+from .tree_index import get_tree_index
+
 log = logging.getLogger(__name__)
 
 
@@ -18,16 +21,25 @@ def pypi_normalize(name):
     return re.sub(r"[-_.]+", "-", name).lower()
 
 
+MANIFEST_NAMES = [
+    "pyproject.toml",
+    "setup.cfg",
+    "setup.py",
+    "package.json",
+    "METADATA.toml",
+]
+
+
+def get_manifest_paths(repo: Repo) -> list[str]:
+    "Repo relative paths of every file that may be read for package names"
+    index = get_tree_index(repo)
+    return [path for name in MANIFEST_NAMES for path in index.find_suffix(name)]
+
+
 def checkout_suffix(repo: Repo, suffix: str):
 
-    all_files_output: str = repo.git.ls_tree("-r", "--name-only", "--full-name", "HEAD")
-    all_filespaths = [f.strip() for f in all_files_output.split("\n")]
-    filepaths = [f for f in all_filespaths if f == suffix or f.endswith(f"/{suffix}")]
+    filepaths = get_tree_index(repo).find_suffix(suffix)
     log.info(f"Found {len(filepaths)} files with suffix {suffix}")
-    if not filepaths:
-        return []
-
-    filepaths.sort(key=len)
 
     return [os.path.join(repo.working_dir, f) for f in filepaths]
 
@@ -57,7 +69,7 @@ def read_pypi_toml(repo: Repo, full_path: str) -> Tuple[Optional[str], Optional[
 
     try:
         # Read and return the license type
-        with open(full_path, "rb") as fd:
+        with open_repo_file(repo, full_path, "rb") as fd:
             data = tomli.load(fd)
     except FileNotFoundError:
         return None, None
@@ -76,7 +88,7 @@ def read_setup_cfg(repo: Repo, full_path: str) -> Tuple[Optional[str], Optional[
     config = configparser.ConfigParser()
     try:
         # Read and return the license type
-        with open(full_path, encoding="utf8", errors="ignore") as fd:
+        with open_repo_file(repo, full_path, encoding="utf8", errors="ignore") as fd:
             config.read_file(fd)
     except FileNotFoundError:
         return None, None
@@ -95,7 +107,7 @@ def read_setup_cfg(repo: Repo, full_path: str) -> Tuple[Optional[str], Optional[
 def read_setup_py(repo: Repo, full_path: str) -> Tuple[Optional[str], Optional[str]]:
     try:
         # Read and return the license type
-        with open(full_path, encoding="utf8", errors="ignore") as fd:
+        with open_repo_file(repo, full_path, encoding="utf8", errors="ignore") as fd:
             setup_code = fd.read()
     except FileNotFoundError:
         return None, None
@@ -115,7 +127,7 @@ def read_npm_package_json(
 ) -> Tuple[Optional[str], Optional[str]]:
     try:
         # Read and return the license type
-        with open(full_path, encoding="utf8", errors="ignore") as fd:
+        with open_repo_file(repo, full_path, encoding="utf8", errors="ignore") as fd:
             data = json.load(fd)
     except FileNotFoundError:
         return None, None
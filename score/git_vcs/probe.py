@@ -0,0 +1,66 @@
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from git.cmd import Git
+from git.exc import GitCommandError, UnsafeProtocolError
+
+from score.models import Source
+from score.notes import Note
+
+from .clone_repo import git_command_error
+
+log = logging.getLogger(__name__)
+
+PROBE_TIMEOUT = 10
+
+
+@dataclass
+class Probe:
+    # The commit sha HEAD points to on the remote, if known
+    head_sha: Optional[str] = None
+    # A Note if the remote can not be cloned
+    error: Optional[str] = None
+
+
+def parse_ls_remote_head(output: str) -> Optional[str]:
+    for line in output.splitlines():
+        sha, _, ref = line.partition("\t")
+        if ref.strip() == "HEAD":
+            return sha.strip()
+    return None
+
+
+def probe_remote(url: str) -> Probe:
+    """
+    Run `git ls-remote` to find out if `url` can be cloned and which
+    commit HEAD points to, without transferring any objects.
+
+    Timeouts and other inconclusive results return an empty Probe so
+    that the caller falls back to cloning.
+    """
+    s = time.time()
+    polished = Git.polish_url(url)
+    try:
+        Git.check_unsafe_protocols(polished)
+        output = str(
+            Git(os.getcwd()).ls_remote(
+                polished, "HEAD", kill_after_timeout=PROBE_TIMEOUT
+            )
+        )
+    except UnsafeProtocolError:
+        return Probe(error=Note.NO_SOURCE_UNSAFE_GIT_PROTOCOL)
+    except GitCommandError as err:
+        if err.status == -9 or not isinstance(err.status, int):
+            log.warning(f"{url}: inconclusive ls-remote: {err.status}: {err.stderr}")
+            return Probe()
+        try:
+            _, source = git_command_error(url, err, Source(source_url=url))
+        except TimeoutError:
+            return Probe()
+        return Probe(error=source.error)
+
+    log.info(f"Probed {url} in {time.time() - s:.2f} seconds")
+    return Probe(head_sha=parse_ls_remote_head(output))
@@ -1,20 +1,29 @@
 import logging
 import os
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import replace
 from datetime import datetime, timedelta
-from glob import glob
-from typing import Iterator
+from typing import Callable, Iterator, Optional, TypeVar
 
-import pandas as pd
 from git import Repo
 
 from score.models import License, Source
 from score.notes import Note
 
+from .blob_reader import open_repo_file, prefetch_blobs
 from .check_url import get_source_from_url
-from .clone_repo import LICENSE_PATTERNS, clone_repo
-from .license_detection import identify_license
-from .package_destinations import get_all_pypackage_names
+from .clone_repo import LICENSE_FILE_NAME, clone_repo
+from .commit_stats import summarize_commits
+from .forge import (
+    FORGE_FAST_PATH,
+    ForgeUnavailable,
+    forge_checkout,
+    get_forge_client,
+)
+from .license_pool import identify_licenses
+from .package_destinations import get_all_pypackage_names, get_manifest_paths
+from .probe import probe_remote
+from .tree_index import get_tree_index
 
 one_year_ago = datetime.now() - timedelta(days=365)
 
@@ -23,21 +32,68 @@ log = logging.getLogger(__name__)
 
 MAX_CLONE_TIME = 30
 
+# Bump when a change to the scraper changes its results for the same commit
+SCRAPER_VERSION = 2
+
+SourceLookup = Callable[[str], Optional[Source]]
+
+T = TypeVar("T")
+
 NOT_A_LICENSE_FILE_EXT = [".json", ".csv", ".svg", ".jpg", ".jpeg"]
 
 
-def create_git_metadata(url: str) -> Source:
+def create_git_metadata(url: str, lookup: Optional[SourceLookup] = None) -> Source:
+    """
+    Clone and analyze the repo at `url`.
+
+    `lookup` is called with the sha the remote HEAD points to, if it
+    returns a Source that result is used without cloning.
+    """
     source = get_source_from_url(url)
     if source.error is not None:
         return source
 
+    probe = probe_remote(url)
+    if probe.error is not None:
+        return replace(source, error=probe.error)
+
+    if lookup is not None and probe.head_sha is not None:
+        known = lookup(probe.head_sha)
+        if known is not None:
+            log.info(f"{url} is unchanged at {probe.head_sha}")
+            return known
+
+    if FORGE_FAST_PATH:
+        forge_metadata = create_forge_metadata(url)
+        if forge_metadata is not None:
+            return forge_metadata
+
     with clone_repo(url) as (repo, metadata):
         if repo is None:
             return metadata
-        metadata = replace(metadata, **get_commit_metadata(repo, url))
-        metadata.licenses = list(get_license_type(repo, url))
+        prefetch_blobs(
+            repo, get_license_file_paths(repo)[:MAX_FILES] + get_manifest_paths(repo)
+        )
+
+        # The commit scan mostly waits on git while license matching is CPU
+        # bound. Leaving the pool waits for every stage, so nothing is still
+        # reading the clone when it is removed.
+        with ThreadPoolExecutor(max_workers=3, thread_name_prefix="scrape") as pool:
+            stages: dict[str, Future] = {
+                "commits": pool.submit(scan_commits, str(repo.git_dir), url),
+                "licenses": pool.submit(lambda: list(get_license_type(repo, url))),
+                "destinations": pool.submit(
+                    lambda: list(get_all_pypackage_names(repo))
+                ),
+            }
+
+        metadata = replace(metadata, **stage_result(stages, "commits", {}, url))
+        metadata.head_sha = get_head_sha(repo)
+        metadata.licenses = stage_result(stages, "licenses", [], url)
         log.info(f"Found {len(metadata.licenses)} licenses in {repo.working_dir}")
-        metadata.package_destinations.extend(get_all_pypackage_names(repo))
+        metadata.package_destinations.extend(
+            stage_result(stages, "destinations", [], url)
+        )
         log.info(
             f"Found {len(metadata.package_destinations)} package destinations in {repo.working_dir}"
         )
@@ -45,47 +101,74 @@ def create_git_metadata(url: str) -> Source:
         return metadata
 
 
-def get_commit_metadata(repo: Repo, url: str) -> dict:
+def stage_result(stages: dict[str, Future], name: str, default: T, url: str) -> T:
+    "The result of a finished stage, or `default` if it failed"
+    err = stages[name].exception()
+    if err is not None:
+        log.error(f"{url}: {name} stage failed: {err!r}")
+        return default
+    return stages[name].result()
+
+
+def create_forge_metadata(url: str, api_url: Optional[str] = None) -> Optional[Source]:
+    """
+    Build the metadata from the forge API without cloning.
+
+    Returns None if the forge is not supported or can not provide all of
+    the data, in which case the repo should be cloned.
+    """
+    client = get_forge_client(url, api_url)
+    if client is None:
+        return None
+
     one_year_ago = datetime.now() - timedelta(days=365)
+    try:
+        with forge_checkout(client) as (repo, snapshot):
+            metadata = Source(
+                source_url=url,
+                head_sha=snapshot.head_sha,
+                **summarize_commits(snapshot.commits, one_year_ago),
+            )
+            metadata.licenses = list(get_license_type(repo, url))
+            metadata.package_destinations.extend(get_all_pypackage_names(repo))
+    except ForgeUnavailable as err:
+        log.info(f"{url}: falling back to clone: {err}")
+        return None
+
+    log.info(
+        f"Found {len(metadata.licenses)} licenses and "
+        f"{len(metadata.package_destinations)} package destinations in {url}"
+    )
+    return metadata
+
 
+def get_head_sha(repo: Repo) -> Optional[str]:
     try:
-        commits = pd.DataFrame(
-            [
-                {"email": c.author.email, "when": c.authored_date}
-                for c in repo.iter_commits()
-            ]
-        )
+        return repo.head.commit.hexsha
+    except ValueError:
+        # Empty repo
+        return None
+
+
+def scan_commits(git_dir: str, url: str) -> dict:
+    "Run get_commit_metadata on a Repo instance that is not shared across threads"
+    repo = Repo(git_dir)
+    try:
+        return get_commit_metadata(repo, url)
+    finally:
+        repo.close()
+
 
+def get_commit_metadata(repo: Repo, url: str) -> dict:
+    one_year_ago = datetime.now() - timedelta(days=365)
+
+    try:
+        commits = [(c.author.email or "", c.authored_date) for c in repo.iter_commits()]
     except ValueError as err:
         log.error(f"{url}: {err}")
         return {"error": Note.REPO_EMPTY}
 
-    # Filter out commits from GitHub's email domain
-    commits = commits[~commits.email.str.endswith("github.com")]
-    commits["when"] = pd.to_datetime(commits.when, unit="s")
-
-    # Calculate recent authors count
-    recent_authors_count = commits[commits.when > one_year_ago].email.nunique()
-
-    # Calculate max monthly authors count
-    commits_by_when = commits.sort_values("when").set_index("when")
-    daily_authors = commits_by_when.resample("D")["email"].nunique()
-    rolling_authors = daily_authors.rolling(window="30D").sum()
-    max_monthly_authors_count = rolling_authors.max()
-
-    first_commit = commits.when.min()
-    latest_commit = commits.when.max()
-    # Return the required metadata
-    return {
-        "recent_authors_count": int(recent_authors_count),
-        "max_monthly_authors_count": (
-            None
-            if pd.isna(max_monthly_authors_count)
-            else int(max_monthly_authors_count)
-        ),
-        "first_commit": None if pd.isna(first_commit) else first_commit,
-        "latest_commit": None if pd.isna(latest_commit) else latest_commit,
-    }
+    return summarize_commits(commits, one_year_ago)
 
 
 def is_valid_license_filename(path: str) -> bool:
@@ -116,18 +199,26 @@ def is_valid_license(path: str, content: str) -> bool:
 MAX_FILES = 2500
 
 
-def get_license_type(repo: Repo, url: str) -> Iterator[License]:
+def is_hidden(path: str) -> bool:
+    return any(part.startswith(".") for part in path.split("/"))
+
 
-    license_file_paths = sorted(
+def get_license_file_paths(repo: Repo) -> list[str]:
+    "Paths of candidate license files relative to the repo root, shortest first"
+    return sorted(
         [
             path
-            for pattern in LICENSE_PATTERNS
-            for path in glob(os.path.join(repo.working_dir, pattern), recursive=True)
-            if is_valid_license_filename(path)
+            for path in get_tree_index(repo).match_names(LICENSE_FILE_NAME)
+            if not is_hidden(path) and is_valid_license_filename(path)
         ],
         key=lambda x: (len(x), x),
     )
 
+
+def get_license_type(repo: Repo, url: str) -> Iterator[License]:
+
+    license_file_paths = get_license_file_paths(repo)
+
     if len(license_file_paths) > MAX_FILES:
         log.warning(
             f"Found {len(license_file_paths)} license files in {repo.working_dir}. "
@@ -135,19 +226,23 @@ def get_license_type(repo: Repo, url: str) -> Iterator[License]:
             "Please check if this is correct."
         )
     log.info(f"Extracting {len(license_file_paths[:MAX_FILES])} license files")
-    for license_file_path in license_file_paths[:MAX_FILES]:
-        log.debug(f"Found license file: {license_file_path}")
+    license_files = []
+    for rel_path in license_file_paths[:MAX_FILES]:
+        log.debug(f"Found license file: {rel_path}")
+        license_file_path = os.path.join(repo.working_dir, rel_path)
         try:
-            with open(
-                license_file_path, encoding="utf8", errors="ignore"
+            with open_repo_file(
+                repo, license_file_path, encoding="utf8", errors="ignore"
             ) as license_file:
                 license_content = license_file.read().strip()
-        except IsADirectoryError:
+        except (IsADirectoryError, FileNotFoundError):
             continue
 
-        rel_path = license_file_path[len(str(repo.working_dir)) + 1 :]
-
         if not is_valid_license(rel_path, license_content):
             continue
 
-        yield identify_license(url, license_content, rel_path)
+        license_files.append((rel_path, license_content))
+
+    licenses = identify_licenses([content for _, content in license_files])
+    for (rel_path, _), license in zip(license_files, licenses):
+        yield replace(license, path=rel_path)
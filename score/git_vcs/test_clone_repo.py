@@ -1,10 +1,19 @@
 import os
+import subprocess
 import tempfile
+from unittest import mock
 
 import pytest
 from git import Repo
 
+from score.models import Source
+from score.notes import Note
+
+from . import scrape, workspace
+from .blob_reader import is_partial_clone, open_repo_file, prefetch_blobs
 from .clone_repo import clone_repo
+from .package_destinations import get_all_pypackage_names
+from .scrape import get_license_type
 
 
 @pytest.fixture(scope="module")
@@ -92,3 +101,90 @@ def test_clone_repo_invalid_git_url():
         assert repo is None
         assert source is not None
         assert source.error is not None
+
+
+def test_clone_repo_no_checkout(git_repo_to_clone):
+    with clone_repo(git_repo_to_clone, mode="no-checkout") as (repo, source):
+        assert repo is not None
+        assert source.error is None
+        license_path = os.path.join(repo.working_dir, "LICENSE")
+        assert not os.path.exists(license_path)
+
+        with open_repo_file(repo, license_path) as fd:
+            assert fd.read() == "MIT License\n"
+
+        with pytest.raises(FileNotFoundError):
+            open_repo_file(repo, os.path.join(repo.working_dir, "missing.txt"))
+
+        destinations = list(get_all_pypackage_names(repo))
+
+    assert destinations == [("npm/test-package", "/package.json")]
+
+
+def test_clone_repo_no_checkout_partial_clone(git_repo_to_clone):
+    source_repo = Repo(git_repo_to_clone)
+    with source_repo.config_writer() as config:
+        config.set_value("uploadpack", "allowFilter", "true")
+        config.set_value("uploadpack", "allowAnySHA1InWant", "true")
+
+    url = f"file://{git_repo_to_clone}"
+    with clone_repo(url, mode="no-checkout") as (repo, source):
+        assert repo is not None
+        assert is_partial_clone(repo)
+
+        prefetch_blobs(repo, ["LICENSE", "package.json"])
+        licenses = list(get_license_type(repo, url))
+
+    assert [license.path for license in licenses] == ["LICENSE"]
+
+
+def test_clone_repo_too_large(git_repo_to_clone, monkeypatch):
+    monkeypatch.setattr(workspace, "MAX_CLONE_SIZE", 1024)
+    with clone_repo(git_repo_to_clone) as (repo, source):
+        assert repo is None
+        assert source.error == Note.NO_SOURCE_REPO_TOO_LARGE
+
+
+def test_wait_within_limits_reports_size(tmp_path):
+    command = ["sh", "-c", "head -c 4096 /dev/zero > data && sleep 0.6"]
+    proc = subprocess.Popen(command, cwd=tmp_path, stderr=subprocess.PIPE)
+    sizes: list[int] = []
+    workspace.wait_within_limits(proc, command, str(tmp_path), 10, on_size=sizes.append)
+    assert sizes and sizes[-1] == 4096
+
+
+def test_clone_repo_workspace_root(git_repo_to_clone, monkeypatch, tmp_path):
+    root = tmp_path / "clones"
+    monkeypatch.setattr(workspace, "CLONE_ROOT", str(root))
+    with clone_repo(git_repo_to_clone) as (repo, source):
+        assert repo is not None
+        assert os.path.dirname(repo.working_dir) == str(root)
+    assert os.listdir(root) == []
+
+
+def test_create_git_metadata(git_repo_to_clone):
+    with mock.patch.object(
+        scrape, "get_source_from_url", return_value=Source(source_url="")
+    ):
+        source = scrape.create_git_metadata(git_repo_to_clone)
+
+    assert source.error is None
+    assert source.head_sha == Repo(git_repo_to_clone).head.commit.hexsha
+    assert source.first_commit is not None
+    assert [license.path for license in source.licenses] == ["LICENSE"]
+    assert source.package_destinations == [("npm/test-package", "/package.json")]
+
+
+def test_create_git_metadata_stage_error(git_repo_to_clone):
+    with mock.patch.object(
+        scrape, "get_source_from_url", return_value=Source(source_url="")
+    ), mock.patch.object(
+        scrape, "get_all_pypackage_names", side_effect=RuntimeError("boom")
+    ):
+        source = scrape.create_git_metadata(git_repo_to_clone)
+
+    # Only the failed stage is missing from the result
+    assert source.error is None
+    assert source.first_commit is not None
+    assert [license.path for license in source.licenses] == ["LICENSE"]
+    assert source.package_destinations == []
@@ -0,0 +1,102 @@
+import threading
+import time
+
+import pytest
+
+from .clone_scheduler import CloneQueueTimeout, CloneScheduler
+
+
+def run_clones(scheduler, clones, hold=0.05):
+    "Run (url, priority) clones in threads and return the admission order"
+    order = []
+    lock = threading.Lock()
+
+    def clone(url, priority):
+        with scheduler.slot(url, priority):
+            with lock:
+                order.append(url)
+            time.sleep(hold)
+
+    threads = []
+    for url, priority in clones:
+        thread = threading.Thread(target=clone, args=(url, priority))
+        thread.start()
+        threads.append(thread)
+        # Make sure clones are queued in order
+        time.sleep(0.01)
+
+    for thread in threads:
+        thread.join()
+    return order
+
+
+def test_max_concurrency():
+    scheduler = CloneScheduler(max_concurrent=2, queue_timeout=5)
+    peak = 0
+    lock = threading.Lock()
+
+    def clone():
+        nonlocal peak
+        with scheduler.slot("url"):
+            with lock:
+                peak = max(peak, scheduler.active)
+            time.sleep(0.02)
+
+    threads = [threading.Thread(target=clone) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak == 2
+    stats = scheduler.stats()
+    assert stats["admitted"] == 8
+    assert stats["active"] == 0
+    assert stats["queue_depth"] == 0
+    assert stats["max_wait"] > 0
+
+
+def test_fifo_then_priority():
+    scheduler = CloneScheduler(max_concurrent=1, queue_timeout=5)
+    order = run_clones(
+        scheduler,
+        [("first", 0), ("low-1", 1), ("low-2", 1), ("high", 0)],
+    )
+    assert order == ["first", "high", "low-1", "low-2"]
+
+
+def test_queue_timeout():
+    scheduler = CloneScheduler(max_concurrent=1, queue_timeout=0.05)
+    with scheduler.slot("running"):
+        with pytest.raises(CloneQueueTimeout):
+            scheduler.acquire("waiting")
+
+    stats = scheduler.stats()
+    assert stats["timeouts"] == 1
+    assert stats["queue_depth"] == 0
+    # The slot is free again
+    with scheduler.slot("next"):
+        pass
+
+
+def test_disk_budget():
+    scheduler = CloneScheduler(
+        max_concurrent=4, queue_timeout=0.05, disk_budget=100, reservation=10
+    )
+    with scheduler.slot("big") as ticket:
+        scheduler.update_usage(ticket, 95)
+        assert scheduler.stats()["disk_used"] == 95
+        with pytest.raises(CloneQueueTimeout):
+            scheduler.acquire("blocked by disk")
+
+        scheduler.update_usage(ticket, 50)
+        with scheduler.slot("fits"):
+            assert scheduler.stats()["disk_used"] == 60
+
+    assert scheduler.stats()["disk_used"] == 0
+
+
+def test_disk_budget_admits_one_large_clone():
+    scheduler = CloneScheduler(disk_budget=10, reservation=100)
+    with scheduler.slot("larger than the budget"):
+        assert scheduler.stats()["active"] == 1
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+from hypothesis import given
+from hypothesis import strategies as st
+
+from .commit_stats import max_rolling_authors, summarize_commits
+
+EMAILS = ["a@example.com", "b@example.com", "c@example.com", "bot@github.com"]
+
+commits_strategy = st.lists(
+    st.tuples(
+        st.sampled_from(EMAILS),
+        # Roughly 1995 to 2030 with second resolution
+        st.integers(min_value=800_000_000, max_value=1_900_000_000),
+    ),
+    max_size=60,
+)
+
+clustered_commits_strategy = st.lists(
+    st.tuples(
+        st.sampled_from(EMAILS),
+        # A few months of history so that windows overlap often
+        st.integers(min_value=1_600_000_000, max_value=1_600_000_000 + 86400 * 90),
+    ),
+    max_size=60,
+)
+
+
+def pandas_commit_metadata(commits, one_year_ago):
+    "Reference implementation using pandas resample + rolling"
+    commits = pd.DataFrame(commits, columns=["email", "when"])
+    commits = commits[~commits.email.str.endswith("github.com")]
+    commits["when"] = pd.to_datetime(commits.when, unit="s")
+
+    recent_authors_count = commits[commits.when > one_year_ago].email.nunique()
+
+    commits_by_when = commits.sort_values("when").set_index("when")
+    daily_authors = commits_by_when.resample("D")["email"].nunique()
+    rolling_authors = daily_authors.rolling(window="30D").sum()
+    max_monthly_authors_count = rolling_authors.max()
+
+    first_commit = commits.when.min()
+    latest_commit = commits.when.max()
+    return {
+        "recent_authors_count": int(recent_authors_count),
+        "max_monthly_authors_count": (
+            None
+            if pd.isna(max_monthly_authors_count)
+            else int(max_monthly_authors_count)
+        ),
+        "first_commit": None if pd.isna(first_commit) else first_commit,
+        "latest_commit": None if pd.isna(latest_commit) else latest_commit,
+    }
+
+
+@given(commits_strategy)
+def test_summarize_commits_matches_pandas(commits):
+    one_year_ago = datetime(2020, 6, 1)
+    assert summarize_commits(commits, one_year_ago) == pandas_commit_metadata(
+        commits, one_year_ago
+    )
+
+
+@given(clustered_commits_strategy)
+def test_max_rolling_authors_matches_pandas_dense(commits):
+    one_year_ago = datetime(2020, 6, 1)
+    expected = pandas_commit_metadata(commits, one_year_ago)
+    actual = summarize_commits(commits, one_year_ago)
+    assert actual["max_monthly_authors_count"] == expected["max_monthly_authors_count"]
+
+
+def test_max_rolling_authors_window_edges():
+    day = 86400
+    start = 1_600_000_000 - 1_600_000_000 % day
+    # Day 0 and day 29 are in the same 30 day window, day 30 is not
+    assert max_rolling_authors([("a", start), ("b", start + 29 * day)]) == 2
+    assert max_rolling_authors([("a", start), ("b", start + 30 * day)]) == 1
+    # The same author on two days is counted once per day
+    assert max_rolling_authors([("a", start), ("a", start + day)]) == 2
+    assert max_rolling_authors([("a", start), ("a", start + 10)]) == 1
+    assert max_rolling_authors([]) is None
+
+
+def test_summarize_commits_only_bots():
+    one_year_ago = datetime.now() - timedelta(days=365)
+    assert summarize_commits([("bot@github.com", 1_600_000_000)], one_year_ago) == {
+        "recent_authors_count": 0,
+        "max_monthly_authors_count": None,
+        "first_commit": None,
+        "latest_commit": None,
+    }
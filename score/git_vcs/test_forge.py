@@ -0,0 +1,180 @@
+import base64
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import pytest
+
+from .forge import ForgeUnavailable, GitHubClient, GitLabClient, get_forge_client
+from .scrape import create_forge_metadata
+
+MIT = """MIT License
+
+Copyright (c) 2024 Example
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+BLOBS = {
+    "b1": MIT.encode(),
+    "b2": b'[project]\nname = "Example_Pkg"\n',
+}
+
+GITHUB_ROUTES = {
+    "/repos/example/pkg": {"default_branch": "main"},
+    "/repos/example/pkg/commits": [
+        {
+            "sha": "c2",
+            "commit": {"author": {"email": "b@x.com", "date": "2024-02-01T00:00:00Z"}},
+        },
+        {
+            "sha": "c1",
+            "commit": {"author": {"email": "a@x.com", "date": "2024-01-01T00:00:00Z"}},
+        },
+    ],
+    "/repos/example/pkg/git/trees/c2": {
+        "truncated": False,
+        "tree": [
+            {"path": "LICENSE", "type": "blob", "sha": "b1"},
+            {"path": "pyproject.toml", "type": "blob", "sha": "b2"},
+            {"path": "src", "type": "tree", "sha": "t1"},
+        ],
+    },
+    **{
+        f"/repos/example/pkg/git/blobs/{oid}": {
+            "encoding": "base64",
+            "content": base64.b64encode(data).decode(),
+        }
+        for oid, data in BLOBS.items()
+    },
+}
+
+# Payloads a forge should not send, the scrape falls back to a clone
+MALFORMED_ROUTES = {
+    "/repos/example/missing-keys": {"default_branch": "main"},
+    "/repos/example/missing-keys/commits": [{"sha": "c1", "commit": {}}],
+    "/repos/example/not-json": b"<html>Service Unavailable</html>",
+    "/repos/example/pkg/git/blobs/garbled": {"encoding": "base64"},
+    "/projects/example%2Fnot-a-list": {"default_branch": "main"},
+    "/projects/example%2Fnot-a-list/repository/commits": {"message": "oops"},
+}
+
+GITLAB_ROUTES = {
+    "/projects/example%2Fpkg": {"default_branch": "main"},
+    "/projects/example%2Fpkg/repository/commits": [
+        {"id": "c1", "author_email": "a@x.com", "authored_date": "2024-01-01T00:00:00Z"}
+    ],
+    "/projects/example%2Fpkg/repository/tree": [
+        {"id": "b2", "path": "pyproject.toml", "type": "blob"},
+        {"id": "t1", "path": "src", "type": "tree"},
+    ],
+}
+
+
+@pytest.fixture(scope="module")
+def forge_server():
+    state = {"status": 200}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = urlparse(self.path).path
+            body = (
+                GITHUB_ROUTES.get(path)
+                or GITLAB_ROUTES.get(path)
+                or MALFORMED_ROUTES.get(path)
+            )
+            if state["status"] != 200 or body is None:
+                self.send_response(state["status"] if body else 404)
+                self.end_headers()
+                return
+            data = body if isinstance(body, bytes) else json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}", state
+    server.shutdown()
+
+
+def test_get_forge_client():
+    assert get_forge_client("https://github.com/example/pkg.git") is not None
+    assert get_forge_client("https://gitlab.com/example/pkg") is not None
+    assert get_forge_client("https://bitbucket.org/example/pkg") is None
+    assert get_forge_client("https://example.com/example/pkg") is None
+
+
+def test_create_forge_metadata(forge_server):
+    api_url, _ = forge_server
+    source = create_forge_metadata("https://github.com/example/pkg", api_url)
+
+    assert source is not None
+    assert source.error is None
+    assert source.head_sha == "c2"
+    assert source.first_commit is not None
+    assert source.first_commit.month == 1
+    assert source.max_monthly_authors_count == 1
+    assert [lic.spdx_id for lic in source.licenses] == ["MIT"]
+    assert source.package_destinations == [("pypi/example-pkg", "/pyproject.toml")]
+
+
+def test_rate_limited_falls_back(forge_server):
+    api_url, state = forge_server
+    state["status"] = 403
+    try:
+        assert create_forge_metadata("https://github.com/example/pkg", api_url) is None
+    finally:
+        state["status"] = 200
+
+
+def test_gitlab_snapshot(forge_server):
+    api_url, _ = forge_server
+    client = GitLabClient("example", "pkg", api_url, None)
+    snapshot = client.snapshot()
+    assert snapshot.head_sha == "c1"
+    assert snapshot.entries == [("pyproject.toml", "b2")]
+    assert snapshot.commits == [("a@x.com", 1704067200)]
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "https://github.com/example/missing-keys",
+        "https://github.com/example/not-json",
+        "https://gitlab.com/example/not-a-list",
+    ],
+)
+def test_malformed_response_falls_back(forge_server, url):
+    api_url, _ = forge_server
+    assert create_forge_metadata(url, api_url) is None
+
+
+def test_malformed_blob(forge_server):
+    api_url, _ = forge_server
+    client = GitHubClient("example", "pkg", api_url, None)
+    with pytest.raises(ForgeUnavailable, match="unexpected response"):
+        client.read("garbled")
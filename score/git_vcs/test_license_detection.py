@@ -0,0 +1,190 @@
+import os
+import random
+from unittest import mock
+
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+from strsimpy import SorensenDice
+
+from score.utils import caching
+
+from . import license_detection
+from .canonical_licenses import read_license
+from .license_detection import (
+    LSH_RECALL,
+    ReferenceMatcher,
+    ReferenceProfile,
+    canonical_key,
+    content_hash,
+    copyright_line,
+    get_all_licenses,
+    get_canonical_licenses,
+    get_reference_matcher,
+    get_reference_profiles,
+    identify_license_cached,
+    license_cache_path,
+    license_content_path,
+    license_diff,
+    license_dir,
+    match_license,
+    normalize,
+    shingles,
+    wait_for_writes,
+)
+
+
+def similarity(a: str, b: str) -> float:
+    matcher = ReferenceMatcher({"b": ReferenceProfile(text=b, shingles=shingles(b))})
+    return float(matcher.similarities(a, shingles(a))[0])
+
+
+# At least 3 characters after collapsing whitespace, strsimpy divides by zero
+# for shorter strings
+TEXT = st.from_regex(r"[abc][ab c\n\t]{1,40}[abc]", fullmatch=True)
+
+
+@given(TEXT, TEXT)
+def test_similarity_matches_strsimpy(a, b):
+    assert similarity(a, b) == SorensenDice().similarity(a, b)
+
+
+def test_reference_profiles():
+    profiles = get_reference_profiles()
+    assert profiles.keys() == get_all_licenses().keys()
+
+    mit = profiles["MIT"]
+    assert mit.text == normalize(get_all_licenses()["MIT"])
+    assert mit.shingles == shingles(mit.text)
+
+
+def test_reference_similarities_match_strsimpy():
+    content = normalize(get_all_licenses()["BSD-3"].replace("the", "a"))
+    sd = SorensenDice()
+    expected = {
+        name: sd.similarity(content, reference.text)
+        for name, reference in get_reference_profiles().items()
+    }
+    matcher = get_reference_matcher()
+    assert (
+        dict(zip(matcher.names, matcher.similarities(content, shingles(content))))
+        == expected
+    )
+
+    best_match = max(expected, key=expected.__getitem__)
+    assert matcher.best_match(content, shingles(content)) == (
+        best_match,
+        expected[best_match],
+    )
+
+
+def edited_licenses(edits: int, seed: int = 0):
+    rng = random.Random(seed)
+    for name, text in get_all_licenses().items():
+        words = text.split()
+        for _ in range(edits):
+            words[rng.randrange(len(words))] = rng.choice(["foo", "bar", "baz"])
+        yield name, normalize(" ".join(words))
+
+
+def test_lsh_accuracy():
+    full_scan = get_reference_matcher()
+    indexed = ReferenceMatcher(get_reference_profiles(), use_lsh=True)
+
+    for edits in [0, 5, 20]:
+        results = [
+            (
+                full_scan.best_match(text, shingles(text)),
+                indexed.best_match(text, shingles(text)),
+            )
+            for _name, text in edited_licenses(edits)
+        ]
+        agree = sum(expected == actual for expected, actual in results)
+        assert agree / len(results) >= LSH_RECALL, edits
+
+
+def test_shared_license_cache(cache_dir):
+    content = get_all_licenses()["MIT"] + "\nwith a twist"
+
+    identify_license_cached.cache_clear()
+    license = identify_license_cached(content)
+    wait_for_writes()
+    assert os.path.exists(license_cache_path(content_hash(content)))
+
+    # A new instance reads the result instead of matching again
+    identify_license_cached.cache_clear()
+    with mock.patch.object(license_detection, "match_license") as match_license:
+        assert identify_license_cached(content) == license
+        match_license.assert_not_called()
+
+
+def test_shared_license_cache_errors(cache_dir, monkeypatch):
+    monkeypatch.setattr(caching.fs, "open", mock.Mock(side_effect=OSError("down")))
+    content = get_all_licenses()["BSD-3"].replace("the", "a")
+
+    # The backend is best-effort, the license is still identified
+    identify_license_cached.cache_clear()
+    license = identify_license_cached(content)
+    assert license.license == "BSD-3"
+    # Without its saved content the diff can not be served
+    assert license.content_sha256 is None
+    wait_for_writes()
+
+
+def test_no_diff_without_cache(monkeypatch):
+    monkeypatch.setattr(caching, "CACHE_LOCATION", "0")
+    content = get_all_licenses()["BSD-3"].replace("the", "a")
+
+    identify_license_cached.cache_clear()
+    license = identify_license_cached(content)
+    assert license.modified
+    assert license.content_sha256 is None
+
+
+def test_canonical_license_fast_path():
+    content = (license_dir / "Apache-2.0").read_text().strip()
+    # Re-wrapped lines hash the same
+    content = content.replace("\n", "\n\n  ")
+
+    identify_license_cached.cache_clear()
+    with mock.patch.object(license_detection, "match_license") as match_license:
+        license = identify_license_cached(content)
+        match_license.assert_not_called()
+    assert license.license == "Apache-2.0"
+
+
+@pytest.mark.parametrize("name, spdx_id", [("MIT", "MIT"), ("BSD-3", "BSD-3-Clause")])
+def test_canonical_license_with_copyright_holder(name, spdx_id):
+    content = "\n".join(
+        "Copyright (c) 2021, Jane Doe" if copyright_line(line) else line
+        for line in read_license(license_dir / name).splitlines()
+    )
+    assert "<YEAR>" not in content
+
+    identify_license_cached.cache_clear()
+    with mock.patch.object(license_detection, "match_license") as match_license:
+        license = identify_license_cached(content)
+        match_license.assert_not_called()
+    assert license.license == spdx_id
+
+
+def test_canonical_licenses_are_current():
+    canonical = get_canonical_licenses()
+    assert len(canonical) == len(list(license_dir.iterdir()))
+    for name in ["MIT", "GPL-3.0"]:
+        content = read_license(license_dir / name)
+        assert canonical[canonical_key(content)] == match_license(content)
+
+
+def test_modified_license_diff_is_lazy(cache_dir):
+    content = get_all_licenses()["BSD-3"].replace("the", "a")
+
+    identify_license_cached.cache_clear()
+    license = identify_license_cached(content)
+    assert license.modified
+    assert license.diff is None
+    assert license.content_sha256 == content_hash(content)
+
+    saved = caching.load_text_from_cache(license_content_path(license.content_sha256))
+    assert saved == content
+    assert "+" in license_diff(license.license, saved)
@@ -0,0 +1,60 @@
+from unittest import mock
+
+import pytest
+
+from score.utils import caching
+
+from . import license_pool
+from .license_detection import (
+    get_all_licenses,
+    license_cache,
+    match_license,
+    wait_for_writes,
+)
+from .license_pool import identify_licenses
+
+
+@pytest.fixture
+def worker_pool(monkeypatch, cache_dir):
+    monkeypatch.setattr(license_pool, "LICENSE_WORKERS", 2)
+    monkeypatch.setattr(license_pool, "LICENSE_BATCH_SIZE", 1)
+    yield
+    license_pool.reset_license_pool()
+
+
+def test_identify_licenses_in_pool(worker_pool):
+    licenses = get_all_licenses()
+    modified = [licenses[name].replace("the", "a") for name in ["BSD-3", "ISC"]]
+    contents = [licenses["MIT"], *modified, modified[0]]
+
+    license_cache.clear()
+    results = identify_licenses(contents)
+
+    assert license_pool._pool is not None
+    assert results[1] == results[3]
+    for content, license in zip(contents, results):
+        assert license == match_license(content)
+
+
+def test_identify_licenses_uses_cache(monkeypatch):
+    content = get_all_licenses()["BSD-3"].replace("the", "a")
+    license_cache.clear()
+    expected = identify_licenses([content])
+
+    monkeypatch.setattr(license_pool, "match_licenses", None)
+    assert identify_licenses([content]) == expected
+
+
+def test_identify_licenses_reads_shared_cache_once(monkeypatch, cache_dir):
+    licenses = get_all_licenses()
+    contents = [licenses[name].replace("the", "a") for name in ["BSD-3", "ISC"]]
+    license_cache.clear()
+    expected = identify_licenses(contents)
+    wait_for_writes()
+
+    # Another instance loads both results with one batch read
+    license_cache.clear()
+    monkeypatch.setattr(license_pool, "match_licenses", None)
+    with mock.patch.object(caching.fs, "cat", wraps=caching.fs.cat) as cat:
+        assert identify_licenses(contents) == expected
+    cat.assert_called_once()
@@ -0,0 +1,36 @@
+import pytest
+
+from .minhash import MinHashLSH, candidate_probability, choose_bands, dice_to_jaccard
+
+
+def shingles(text: str) -> set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def test_dice_to_jaccard():
+    assert dice_to_jaccard(1.0) == 1.0
+    assert dice_to_jaccard(0.0) == 0.0
+    assert dice_to_jaccard(0.9) == pytest.approx(0.818, abs=1e-3)
+
+
+@pytest.mark.parametrize("recall", [0.9, 0.99, 0.999])
+def test_choose_bands(recall):
+    bands, rows = choose_bands(128, 0.8, recall)
+    assert bands * rows <= 128
+    assert candidate_probability(0.8, bands, rows) >= recall
+    # One more row per band would miss the recall target
+    assert candidate_probability(0.8, 128 // (rows + 1), rows + 1) < recall
+
+
+def test_query():
+    lsh = MinHashLSH(threshold=0.8, recall=0.99)
+    texts = [
+        "the quick brown fox jumps over the lazy dog",
+        "lorem ipsum dolor sit amet consectetur adipiscing elit",
+    ]
+    for key, text in enumerate(texts):
+        lsh.add(key, shingles(text))
+
+    assert lsh.query(shingles(texts[0])) == [0]
+    assert lsh.query(shingles("the quick brown fox jumps over the lazy dogs")) == [0]
+    assert lsh.query(shingles("something else entirely")) == []
@@ -0,0 +1,71 @@
+import os
+import tempfile
+from unittest import mock
+
+import pytest
+from git import Repo
+
+from score.models import Source
+from score.notes import Note
+
+from . import scrape
+from .probe import Probe, parse_ls_remote_head, probe_remote
+
+
+@pytest.fixture(scope="module")
+def local_repo():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        repo = Repo.init(tmpdir)
+        path = os.path.join(tmpdir, "LICENSE")
+        with open(path, "w") as f:
+            f.write("MIT License\n")
+        repo.index.add([path])
+        repo.index.commit("Initial commit")
+        yield repo
+        repo.close()
+
+
+def test_parse_ls_remote_head():
+    output = "abc123\tHEAD\ndef456\trefs/heads/main"
+    assert parse_ls_remote_head(output) == "abc123"
+    assert parse_ls_remote_head("") is None
+
+
+def test_probe_remote(local_repo):
+    probe = probe_remote(local_repo.working_dir)
+    assert probe.error is None
+    assert probe.head_sha == local_repo.head.commit.hexsha
+
+
+def test_probe_remote_missing():
+    probe = probe_remote("/tmp/definitely/does/not/exist")
+    assert probe.head_sha is None
+    assert probe.error is not None
+
+
+def test_probe_remote_unsafe_protocol():
+    probe = probe_remote("ext::sh -c touch% /tmp/pwned")
+    assert probe.error == Note.NO_SOURCE_UNSAFE_GIT_PROTOCOL
+
+
+def test_unchanged_head_skips_clone():
+    url = "https://github.com/example/example"
+    previous = Source(source_url=url, head_sha="abc123")
+
+    with mock.patch.object(
+        scrape, "probe_remote", return_value=Probe(head_sha="abc123")
+    ), mock.patch.object(scrape, "clone_repo") as clone:
+        lookup = {"abc123": previous}.get
+        assert scrape.create_git_metadata(url, lookup=lookup) is previous
+        clone.assert_not_called()
+
+
+def test_probe_error_skips_clone():
+    url = "https://github.com/example/example"
+
+    with mock.patch.object(
+        scrape, "probe_remote", return_value=Probe(error=Note.NO_SOURCE_REPO_NOT_FOUND)
+    ), mock.patch.object(scrape, "clone_repo") as clone:
+        source = scrape.create_git_metadata(url)
+        assert source.error == Note.NO_SOURCE_REPO_NOT_FOUND
+        clone.assert_not_called()
@@ -0,0 +1,102 @@
+import os
+import tempfile
+from glob import glob
+from unittest import mock
+
+import pytest
+from git import Repo
+
+from .clone_repo import LICENSE_PATTERNS, clone_repo
+from .package_destinations import get_all_pypackage_names
+from .scrape import get_license_file_paths, is_valid_license_filename
+from .tree_index import TreeIndex, get_tree_index
+
+FILES = {
+    "pyproject.toml": '[project]\nname = "Root_Pkg"\n',
+    "libs/sub/pyproject.toml": '[project]\nname = "sub-pkg"\n',
+    "libs/setup.cfg": "[metadata]\nname = cfg-pkg\n",
+    "web/package.json": '{"name": "web-pkg"}\n',
+    "LICENSE": "MIT License\n",
+    "src/not_a_pyproject.toml": "",
+    "COPYING.LESSER": "GNU LESSER GENERAL PUBLIC LICENSE\n",
+    "vendor/lib/licence.txt": "Apache License\n",
+    "vendor/lib/LICENSE.json": "{}\n",
+    "vendor/Licence": "not matched by the patterns\n",
+    ".github/LICENSE": "hidden\n",
+    "docs/copying": "copying\n",
+}
+
+
+@pytest.fixture(scope="module")
+def monorepo():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        repo = Repo.init(tmpdir)
+        for path, content in FILES.items():
+            full_path = os.path.join(tmpdir, path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, "w") as f:
+                f.write(content)
+        repo.index.add(list(FILES))
+        repo.index.commit("Initial commit")
+
+        yield tmpdir
+
+        repo.close()
+
+
+def test_tree_index_find_suffix():
+    index = TreeIndex.from_ls_tree(
+        "100644 blob aaa\tdeep/nested/setup.py\0"
+        "100644 blob bbb\tsetup.py\0"
+        "100644 blob ccc\tnot_setup.py\0"
+        "160000 commit ddd\tvendored/setup.py\0"
+    )
+    assert len(index) == 3
+    assert index.find_suffix("setup.py") == ["setup.py", "deep/nested/setup.py"]
+    assert index.find_suffix("nested/setup.py") == ["deep/nested/setup.py"]
+    assert index.find_suffix("package.json") == []
+    assert index.oids["setup.py"] == "bbb"
+
+
+def test_tree_index_is_built_once_per_clone(monorepo):
+    with clone_repo(monorepo) as (repo, source):
+        assert repo is not None
+        with mock.patch.object(
+            TreeIndex, "from_repo", wraps=TreeIndex.from_repo
+        ) as from_repo:
+            destinations = list(get_all_pypackage_names(repo))
+            assert get_tree_index(repo) is get_tree_index(repo)
+
+        assert from_repo.call_count == 1
+
+    assert destinations == [
+        ("pypi/root-pkg", "/pyproject.toml"),
+        ("pypi/sub-pkg", "/libs/sub/pyproject.toml"),
+        ("pypi/cfg-pkg", "/libs/setup.cfg"),
+        ("npm/web-pkg", "/web/package.json"),
+    ]
+
+
+def test_license_file_paths_match_glob(monorepo):
+    with clone_repo(monorepo) as (repo, source):
+        assert repo is not None
+        globbed = sorted(
+            [
+                os.path.relpath(path, repo.working_dir)
+                for pattern in LICENSE_PATTERNS
+                for path in glob(
+                    os.path.join(repo.working_dir, pattern), recursive=True
+                )
+                if is_valid_license_filename(path)
+            ],
+            key=lambda x: (len(x), x),
+        )
+        paths = get_license_file_paths(repo)
+
+    assert paths == globbed
+    assert paths == [
+        "LICENSE",
+        "docs/copying",
+        "COPYING.LESSER",
+        "vendor/lib/licence.txt",
+    ]
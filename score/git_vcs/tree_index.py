@@ -0,0 +1,106 @@
+import logging
+import posixpath
+import threading
+import time
+from collections import defaultdict
+from typing import Iterable, Pattern, Tuple
+from weakref import WeakKeyDictionary
+
+from git import Repo
+
+log = logging.getLogger(__name__)
+
+
+class TreeIndex:
+    """
+    An index of every file in a commit, built from a single
+    `git ls-tree -r` call.
+
+    Paths are relative to the repository root and use forward slashes.
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, str]]):
+        # path -> blob sha
+        self.oids: dict[str, str] = {}
+        # file name -> paths, shortest path first
+        self.by_name: dict[str, list[str]] = defaultdict(list)
+
+        for path, oid in entries:
+            self.oids[path] = oid
+            self.by_name[posixpath.basename(path)].append(path)
+
+        for paths in self.by_name.values():
+            paths.sort(key=len)
+
+    def __len__(self):
+        return len(self.oids)
+
+    @property
+    def paths(self) -> Iterable[str]:
+        return self.oids.keys()
+
+    def find_suffix(self, suffix: str) -> list[str]:
+        "All paths that are `suffix` or end with `/suffix`, shortest first"
+        if "/" not in suffix:
+            return list(self.by_name.get(suffix, []))
+
+        paths = [p for p in self.oids if p == suffix or p.endswith(f"/{suffix}")]
+        paths.sort(key=len)
+        return paths
+
+    def match_names(self, pattern: Pattern[str]) -> list[str]:
+        "All paths whose file name fully matches `pattern`"
+        return [
+            path
+            for name, paths in self.by_name.items()
+            if pattern.match(name)
+            for path in paths
+        ]
+
+    @classmethod
+    def from_ls_tree(cls, output: str) -> "TreeIndex":
+        "Parse the output of `git ls-tree -r -z --full-name`"
+
+        def entries():
+            for record in output.split("\0"):
+                if not record:
+                    continue
+                info, path = record.split("\t", 1)
+                _mode, kind, oid = info.split(" ")
+                if kind == "blob":
+                    yield path, oid
+
+        return cls(entries())
+
+    @classmethod
+    def from_repo(cls, repo: Repo, rev: str = "HEAD") -> "TreeIndex":
+        s = time.time()
+        output: str = repo.git.ls_tree("-r", "-z", "--full-name", rev)
+        index = cls.from_ls_tree(output)
+        log.info(f"Indexed {len(index)} files in {time.time() - s:.2f} seconds")
+        return index
+
+
+_indexes: "WeakKeyDictionary[Repo, TreeIndex]" = WeakKeyDictionary()
+_indexes_lock = threading.Lock()
+
+
+def get_tree_index(repo: Repo) -> TreeIndex:
+    "Return the tree index of HEAD for this clone, building it on first use"
+    with _indexes_lock:
+        index = _indexes.get(repo)
+        if index is None:
+            index = TreeIndex.from_repo(repo)
+            _indexes[repo] = index
+        return index
+
+
+def set_tree_index(repo: Repo, index: TreeIndex):
+    "Use an index built from another source, such as a forge API"
+    with _indexes_lock:
+        _indexes[repo] = index
+
+
+def forget_tree_index(repo: Repo):
+    with _indexes_lock:
+        _indexes.pop(repo, None)
@@ -0,0 +1,123 @@
+import logging
+import os
+import signal
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+from git.exc import GitCommandError
+
+log = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+# Directory to clone into, e.g. /dev/shm for a memory backed workspace.
+# Defaults to the system temporary directory
+CLONE_ROOT = os.environ.get("SCORE_CLONE_ROOT") or None
+# Hard limit on the size of a single clone
+MAX_CLONE_SIZE = int(os.environ.get("SCORE_MAX_CLONE_SIZE_MB", "1024")) * MB
+# Seconds between size checks while git is running
+SIZE_POLL_INTERVAL = 0.25
+
+
+class CloneTooLarge(Exception):
+    def __init__(self, path: str, size: int, limit: int):
+        super().__init__(f"Clone {path} uses {size} bytes, the limit is {limit}")
+        self.size = size
+
+
+def dir_size(path: str) -> int:
+    "Bytes used by the files under `path`"
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                continue
+    return total
+
+
+def check_size(path: str, limit: Optional[int] = None) -> int:
+    "Return the size of the workspace or raise CloneTooLarge"
+    if limit is None:
+        limit = MAX_CLONE_SIZE
+    size = dir_size(path)
+    if size > limit:
+        raise CloneTooLarge(path, size, limit)
+    return size
+
+
+@contextmanager
+def clone_workspace(root: Optional[str] = None) -> Iterator[str]:
+    "A temporary directory for one clone under the configured root"
+    if root is None:
+        root = CLONE_ROOT
+    if root is not None:
+        os.makedirs(root, exist_ok=True)
+    with tempfile.TemporaryDirectory(
+        prefix="score", suffix=".git", dir=root, ignore_cleanup_errors=True
+    ) as tmpdir:
+        yield tmpdir
+
+
+def kill_process_tree(proc: subprocess.Popen):
+    "Kill a git process and its helpers such as git-remote-https and index-pack"
+    children = subprocess.run(
+        ["ps", "-o", "pid=", "--ppid", str(proc.pid)], capture_output=True, text=True
+    ).stdout.split()
+    proc.kill()
+    for pid in children:
+        try:
+            os.kill(int(pid), signal.SIGKILL)
+        except (OSError, ValueError):
+            pass
+    proc.communicate()
+
+
+def wait_within_limits(
+    proc: subprocess.Popen,
+    command: list[str],
+    workspace: str,
+    timeout: float,
+    max_size: Optional[int] = None,
+    on_size: Optional[Callable[[int], None]] = None,
+):
+    """
+    Wait for a git process, killing it if it runs longer than `timeout`
+    seconds or grows `workspace` beyond `max_size` bytes. `on_size` is
+    called with each size measured while git runs.
+
+    Raises GitCommandError like GitPython does when the command fails or
+    times out, and CloneTooLarge when the size limit is hit.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _stdout, stderr = proc.communicate(timeout=SIZE_POLL_INTERVAL)
+            break
+        except subprocess.TimeoutExpired:
+            pass
+
+        try:
+            size = check_size(workspace, max_size)
+        except CloneTooLarge:
+            kill_process_tree(proc)
+            raise
+        if on_size is not None:
+            on_size(size)
+
+        if time.monotonic() > deadline:
+            kill_process_tree(proc)
+            raise GitCommandError(
+                command,
+                -9,
+                f"Timeout: the command did not complete in {timeout} secs.",
+            )
+
+    if proc.returncode != 0:
+        raise GitCommandError(
+            command, proc.returncode, stderr.decode(errors="ignore") if stderr else ""
+        )
@@ -43,8 +43,13 @@ class License:
     best_match: Optional[str] = None
     similarity: Optional[float] = None
     modified: bool = False
+    # No longer filled in, see content_sha256
     diff: Optional[str] = None
     md5: Optional[str] = None
+    # For modified licenses, the sha256 of the license file. The diff with
+    # the reference license it matched is served from
+    # /license/diff/{license}/{content_sha256}
+    content_sha256: Optional[str] = None
     # Additional fields for license metadata
     name: Optional[str] = None
     restrictions: List[str] = field(default_factory=list)
@@ -65,6 +70,8 @@ class Source:
     max_monthly_authors_count: Optional[int] = None
     first_commit: Optional[datetime] = None
     latest_commit: Optional[datetime] = None
+    # The commit these results were computed from
+    head_sha: Optional[str] = None
 
 
 @dataclass
@@ -61,3 +61,4 @@ class Note:
     LICENSE_RESTRICTION_WEAK_COPYLEFT: ClassVar[str]
     PACKAGE_LICENSE_NOT_SPDX_ID: ClassVar[str]
     NO_SOURCE_PRIVATE_REPO: ClassVar[str]
+    NO_SOURCE_REPO_TOO_LARGE: ClassVar[str]
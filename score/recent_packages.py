@@ -0,0 +1,115 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from itertools import islice
+from typing import Iterable, Optional, Tuple
+
+from .utils.caching import cache_path, load_text_from_cache, save_text_to_cache
+
+log = logging.getLogger(__name__)
+
+# Number of packages remembered
+RECENT_PACKAGES_SIZE = int(os.environ.get("SCORE_RECENT_PACKAGES_SIZE", "256"))
+# Seconds between merging the packages into the cache backend, 0 never does
+RECENT_PACKAGES_SYNC_INTERVAL = float(
+    os.environ.get("SCORE_RECENT_PACKAGES_SYNC_INTERVAL", "60")
+)
+
+Key = Tuple[str, str]
+
+
+def recent_packages_path() -> str:
+    return cache_path("recent/packages.json")
+
+
+class RecentPackages:
+    """
+    The last `size` distinct (ecosystem, package_name) pairs that were
+    scored, most recent first.
+
+    Instances share their packages through the cache backend: every
+    `sync_interval` seconds the stored list is loaded, merged behind the
+    packages seen here and saved again.
+    """
+
+    def __init__(
+        self,
+        size: int = RECENT_PACKAGES_SIZE,
+        sync_interval: float = RECENT_PACKAGES_SYNC_INTERVAL,
+    ):
+        assert size > 0, "size must be positive"
+        self.size = size
+        self.sync_interval = sync_interval
+        self.lock = threading.Lock()
+        # Least recent first, so that the oldest entry is popped
+        self.packages: OrderedDict[Key, None] = OrderedDict()
+        self.started = False
+        self.last_sync = time.monotonic()
+
+    def start(self) -> Optional[threading.Thread]:
+        """
+        Load the packages of other instances in a thread, once, so that
+        requests neither wait on the cache backend nor load them each.
+        """
+        with self.lock:
+            if self.started or self.sync_interval <= 0:
+                return None
+            self.started = True
+        thread = threading.Thread(target=lambda: self.merge(self.load()), daemon=True)
+        thread.start()
+        return thread
+
+    def add(self, ecosystem: str, package_name: str):
+        now = time.monotonic()
+        with self.lock:
+            self.packages[(ecosystem, package_name)] = None
+            self.packages.move_to_end((ecosystem, package_name))
+            if len(self.packages) > self.size:
+                self.packages.popitem(last=False)
+
+            sync = 0 < self.sync_interval <= now - self.last_sync
+            if sync:
+                self.last_sync = now
+
+        if sync:
+            # Off the request path, the cache backend may be slow
+            threading.Thread(target=self.sync, daemon=True).start()
+
+    def recent(self, limit: int) -> list[Key]:
+        with self.lock:
+            return list(islice(reversed(self.packages), limit))
+
+    def merge(self, older: Iterable[Key]):
+        "Add packages seen before any of the ones already here"
+        with self.lock:
+            for key in older:
+                if len(self.packages) >= self.size:
+                    break
+                if key not in self.packages:
+                    self.packages[key] = None
+                    self.packages.move_to_end(key, last=False)
+
+    def load(self) -> list[Key]:
+        try:
+            text = load_text_from_cache(recent_packages_path())
+            if text is None:
+                return []
+            return [(ecosystem, name) for ecosystem, name in json.loads(text)]
+        except Exception:
+            log.exception("Failed to load recent packages")
+            return []
+
+    def sync(self):
+        self.merge(self.load())
+        try:
+            save_text_to_cache(
+                json.dumps(self.recent(self.size)), recent_packages_path()
+            )
+        except Exception:
+            log.exception("Failed to save recent packages")
+
+
+recently_scored = RecentPackages()
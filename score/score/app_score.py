@@ -13,7 +13,7 @@ from .health_risk import build_health_risk_score
 from .legal import build_legal_score
 from .maturity import build_maturity_score
 from .score import safe_date_diff
-from .score_type import ScoreBuilder
+from .score_table import get_score_table
 from .security import score_security
 
 
@@ -137,11 +137,6 @@ def build_score(
     else:
         notes = build_notes(source_url, source_data, package_data, vuln_data)
 
-    notes = set(notes)
-    return ScoreType(
-        notes=sorted(notes),
-        legal=ScoreBuilder.legal(notes).asmodel(),
-        health_risk=ScoreBuilder.health_risk(notes).asmodel(),
-        maturity=ScoreBuilder.maturity(notes).asmodel(),
-        security=ScoreBuilder.security(notes).asmodel(),
-    )
+    # The scores keep the notes in the order they were found, not in set
+    # order, so that the same inputs serialize to the same bytes everywhere
+    return ScoreType(notes=sorted(set(notes)), **get_score_table().scores(notes))
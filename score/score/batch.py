@@ -0,0 +1,422 @@
+"""
+Score many packages at once from columns of their stored records.
+
+Each rule of build_score is evaluated for all rows with numpy operations,
+the notes are then collected per row in the order build_notes yields them
+so that the scores are identical to build_score.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from hashlib import md5
+from typing import Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from score.models import CategorizedScore, Package
+from score.models import Score as ScoreType
+from score.models import Source, Vulnerabilities
+from score.notes import FEW_MAX_MONTHLY_AUTHORS_CONST, LONG_TIME_TO_FIX, Note
+from score.utils.normalize_license_content import normalize_license_content
+
+from . import maturity
+from .app_score import package_normalize_name
+from .score_table import get_score_table
+
+# In the order score_license checks them
+RESTRICTION_NOTES = {
+    "derivative-work-copyleft": Note.LICENSE_RESTRICTION_DERIVATIVE_WORK_COPYLEFT,
+    "network-copyleft": Note.LICENSE_RESTRICTION_NETWORK_COPYLEFT,
+    "patent-grant": Note.LICENSE_RESTRICTION_PATENT_GRANT,
+    "commercial-restrictions": Note.LICENSE_RESTRICTION_COMMERCIAL,
+    "user-data-access": Note.LICENSE_RESTRICTION_USER_DATA_ACCESS,
+    "cryptographic-autonomy": Note.LICENSE_RESTRICTION_CRYPTOGRAPHIC_AUTONOMY,
+    "weak-copyleft": Note.LICENSE_RESTRICTION_WEAK_COPYLEFT,
+}
+
+Record = Tuple[Optional[Source], Package, Vulnerabilities]
+
+
+def datetime_column(values: Iterable[Optional[datetime]]) -> np.ndarray:
+    "Naive UTC datetimes, as safe_date_diff compares them, None is NaT"
+    return np.array(
+        [
+            (
+                value.astimezone(timezone.utc).replace(tzinfo=None)
+                if value is not None and value.tzinfo is not None
+                else value
+            )
+            for value in values
+        ],
+        dtype="datetime64[us]",
+    )
+
+
+def optional_column(values: Iterable[Optional[float]]) -> np.ndarray:
+    return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+
+def count_by_row(row: np.ndarray, mask: np.ndarray, rows: int) -> np.ndarray:
+    return np.bincount(row, weights=mask, minlength=rows).astype(int)
+
+
+def median_by_row(row: np.ndarray, values: np.ndarray, rows: int) -> np.ndarray:
+    "security.median of the values of each row, -1 for rows without values"
+    if not len(values):
+        return np.full(rows, -1)
+    order = np.lexsort((values, row))
+    values = values[order]
+    counts = np.bincount(row, minlength=rows)
+    starts = np.cumsum(counts) - counts
+    upper = values[np.minimum(starts + counts // 2, len(values) - 1)]
+    lower = values[np.clip(starts + counts // 2 - 1, 0, len(values) - 1)]
+    median = np.where(counts % 2 == 1, upper, (lower + upper) // 2)
+    return np.where(counts > 0, median, -1)
+
+
+@dataclass
+class LicenseColumns:
+    # Index of the record each license belongs to, in record order
+    row: np.ndarray
+    error: np.ndarray
+    license: np.ndarray
+    kind: np.ndarray
+    md5: np.ndarray
+    additional_text: np.ndarray
+    spdx_id: np.ndarray
+    is_osi_approved: np.ndarray
+    # One column per RESTRICTION_NOTES key
+    restrictions: np.ndarray
+    modified: np.ndarray
+
+
+@dataclass
+class VulnerabilityColumns:
+    row: np.ndarray
+    published_on: np.ndarray
+    severity_num: np.ndarray
+    days_to_fix: np.ndarray
+
+
+@dataclass
+class DestinationColumns:
+    row: np.ndarray
+    name: np.ndarray
+
+
+@dataclass
+class ScoreColumns:
+    """
+    The fields of Source, Package and Vulnerabilities records that
+    build_score reads, one array per field. Lists of licenses,
+    vulnerabilities and package destinations are flattened into their own
+    columns with the index of the record they belong to.
+    """
+
+    has_source: np.ndarray
+    source_error: np.ndarray
+    first_commit: np.ndarray
+    latest_commit: np.ndarray
+    recent_authors_count: np.ndarray
+    max_monthly_authors_count: np.ndarray
+
+    package_name: np.ndarray
+    ecosystem: np.ndarray
+    package_license: np.ndarray
+    package_status: np.ndarray
+    release_date: np.ndarray
+
+    licenses: LicenseColumns
+    vulnerabilities: VulnerabilityColumns
+    destinations: DestinationColumns
+
+    def __len__(self):
+        return len(self.has_source)
+
+    @classmethod
+    def from_records(cls, records: Sequence[Record]) -> "ScoreColumns":
+        empty = Source(source_url="")
+        sources = [source or empty for source, _, _ in records]
+        packages = [package for _, package, _ in records]
+        licenses = [
+            (i, license)
+            for i, source in enumerate(sources)
+            for license in source.licenses
+        ]
+        vulns = [(i, vuln) for i, (_, _, v) in enumerate(records) for vuln in v.vulns]
+        destinations = [
+            (i, name)
+            for i, source in enumerate(sources)
+            for name, _ in source.package_destinations
+        ]
+
+        return cls(
+            has_source=np.array(
+                [source is not None for source, _, _ in records], dtype=bool
+            ),
+            source_error=np.array([s.error for s in sources], dtype=object),
+            first_commit=datetime_column(s.first_commit for s in sources),
+            latest_commit=datetime_column(s.latest_commit for s in sources),
+            recent_authors_count=optional_column(
+                s.recent_authors_count for s in sources
+            ),
+            max_monthly_authors_count=optional_column(
+                s.max_monthly_authors_count for s in sources
+            ),
+            package_name=np.array([p.name for p in packages], dtype=object),
+            ecosystem=np.array([p.ecosystem for p in packages], dtype=object),
+            package_license=np.array([p.license for p in packages], dtype=object),
+            package_status=np.array([p.status for p in packages], dtype=object),
+            release_date=datetime_column(p.release_date for p in packages),
+            licenses=LicenseColumns(
+                row=np.array([i for i, _ in licenses], dtype=int),
+                error=np.array([lic.error for _, lic in licenses], dtype=object),
+                license=np.array([lic.license for _, lic in licenses], dtype=object),
+                kind=np.array([lic.kind for _, lic in licenses], dtype=object),
+                md5=np.array([lic.md5 for _, lic in licenses], dtype=object),
+                additional_text=np.array(
+                    [bool(lic.additional_text) for _, lic in licenses], dtype=bool
+                ),
+                spdx_id=np.array([bool(lic.spdx_id) for _, lic in licenses], bool),
+                is_osi_approved=np.array(
+                    [lic.is_osi_approved is True for _, lic in licenses], dtype=bool
+                ),
+                restrictions=np.array(
+                    [
+                        [r in lic.restrictions for r in RESTRICTION_NOTES]
+                        for _, lic in licenses
+                    ],
+                    dtype=bool,
+                ).reshape(len(licenses), len(RESTRICTION_NOTES)),
+                modified=np.array([lic.modified for _, lic in licenses], bool),
+            ),
+            vulnerabilities=VulnerabilityColumns(
+                row=np.array([i for i, _ in vulns], dtype=int),
+                published_on=datetime_column(v.published_on for _, v in vulns),
+                severity_num=optional_column(v.severity_num for _, v in vulns),
+                days_to_fix=optional_column(v.days_to_fix for _, v in vulns),
+            ),
+            destinations=DestinationColumns(
+                row=np.array([i for i, _ in destinations], dtype=int),
+                name=np.array([name for _, name in destinations], dtype=object),
+            ),
+        )
+
+
+def license_notes(columns: ScoreColumns) -> list[list[str]]:
+    "The notes score_license yields for each row that has a source"
+    rows = len(columns)
+    lic = columns.licenses
+    notes: list[list[str]] = [[] for _ in range(rows)]
+    no_error = np.array([error is None for error in columns.source_error], bool)
+    checked_rows = columns.has_source & no_error
+
+    no_license = checked_rows & (count_by_row(lic.row, lic.row >= 0, rows) == 0)
+    for i in np.flatnonzero(no_license):
+        notes[i].append(Note.NO_LICENSE)
+
+    # The first license with an error or an unknown license ends the checks
+    has_error = lic.error.astype(bool)
+    stops = has_error | (lic.license == "Unknown")
+    stops_before = np.cumsum(stops) - stops
+    row_starts = np.searchsorted(lic.row, np.arange(rows))
+    checked = checked_rows[lic.row] & (
+        stops_before == stops_before[row_starts[lic.row]]
+    )
+
+    flags = np.column_stack(
+        [
+            lic.additional_text,
+            ~lic.spdx_id,
+            lic.spdx_id & ~lic.is_osi_approved,
+            lic.restrictions,
+            lic.modified,
+        ]
+    )
+    codes = [
+        Note.LICENSE_ADDITIONAL_TEXT,
+        Note.LICENSE_NOT_IN_SPDX,
+        Note.LICENSE_NOT_OSI_APPROVED,
+        *RESTRICTION_NOTES.values(),
+        Note.LICENSE_MODIFIED,
+    ]
+    for j in np.flatnonzero(checked):
+        row = notes[lic.row[j]]
+        if has_error[j]:
+            row.append(lic.error[j])
+        elif stops[j]:
+            row.append(Note.LICENSE_UNKNOWN)
+        else:
+            row.extend(codes[k] for k in np.flatnonzero(flags[j]))
+
+    return notes
+
+
+def package_notes(columns: ScoreColumns) -> list[list[str]]:
+    "The notes score_python yields for each row that has a source"
+    rows = len(columns)
+    notes: list[list[str]] = [[] for _ in range(rows)]
+    checked = columns.has_source & ~columns.source_error.astype(bool)
+
+    dest = columns.destinations
+    packages = list(zip(columns.ecosystem, columns.package_name))
+    normalized = {
+        (ecosystem, name): f"{ecosystem}/{package_normalize_name(ecosystem, name)}"
+        for ecosystem, name in set(packages)
+    }
+    published = np.array([normalized[package] for package in packages], dtype=str)
+    prefixes = np.array([f"{ecosystem}/" for ecosystem in columns.ecosystem], str)
+    names = dest.name.astype(str)
+    in_ecosystem = np.strings.startswith(names, prefixes[dest.row])
+    matches = in_ecosystem & (names == published[dest.row])
+    no_project = checked & (count_by_row(dest.row, in_ecosystem, rows) == 0)
+    mismatch = checked & ~no_project & (count_by_row(dest.row, matches, rows) == 0)
+
+    one_year = np.timedelta64(timedelta(days=365))
+    skew = columns.latest_commit - columns.release_date
+    not_updated = checked & (skew > one_year)
+    not_released = checked & (skew < -one_year)
+
+    lic = columns.licenses
+    has_license = columns.package_license.astype(bool)
+    license_md5 = {
+        license: md5(normalize_license_content(license).encode("utf-8")).hexdigest()
+        for license in set(columns.package_license)
+        if license
+    }
+    package_md5 = np.array(
+        [license_md5.get(license) for license in columns.package_license], object
+    )
+    kinds = lic.kind.astype(bool)
+    known_kinds = kinds & (
+        np.strings.lower(np.where(kinds, lic.kind, "").astype(str)) != "unknown"
+    )
+    agrees = known_kinds & (
+        (lic.kind == columns.package_license[lic.row])
+        | (lic.md5 == package_md5[lic.row])
+    )
+    disagrees = has_license & (count_by_row(lic.row, agrees, rows) == 0)
+    long_license = np.array(
+        [
+            len(license) > 100 if license else False
+            for license in columns.package_license
+        ],
+        dtype=bool,
+    )
+
+    for mask, note in [
+        (no_project, Note.NO_PROJECT_NAME),
+        (mismatch, Note.PACKAGE_NAME_MISMATCH),
+        (not_updated, Note.PACKAGE_SKEW_NOT_UPDATED),
+        (not_released, Note.PACKAGE_SKEW_NOT_RELEASED),
+        (checked & ~has_license, Note.PACKAGE_NO_LICENSE),
+        (checked & disagrees & long_license, Note.PACKAGE_LICENSE_NOT_SPDX_ID),
+        (checked & disagrees & ~long_license, Note.PACKAGE_LICENSE_MISMATCH),
+    ]:
+        for i in np.flatnonzero(mask):
+            notes[i].append(note)
+    return notes
+
+
+def security_notes(columns: ScoreColumns) -> list[Tuple[np.ndarray, str]]:
+    rows = len(columns)
+    vulns = columns.vulnerabilities
+
+    fixed = ~np.isnan(vulns.days_to_fix)
+    median_days_to_fix = median_by_row(
+        vulns.row[fixed], vulns.days_to_fix[fixed].astype(np.int64), rows
+    )
+
+    recent_cutoff = datetime.now(tz=timezone.utc) - timedelta(days=LONG_TIME_TO_FIX)
+    recent = vulns.published_on > np.datetime64(recent_cutoff.replace(tzinfo=None))
+    severe = recent & (vulns.severity_num >= 7)
+
+    return [
+        (median_days_to_fix > LONG_TIME_TO_FIX, Note.VULNERABILITIES_LONG_TIME_TO_FIX),
+        (count_by_row(vulns.row, recent, rows) > 2, Note.VULNERABILITIES_RECENT),
+        (count_by_row(vulns.row, severe, rows) > 0, Note.VULNERABILITIES_SEVERE),
+    ]
+
+
+def build_notes(columns: ScoreColumns) -> list[list[str]]:
+    "The notes of app_score.build_score for each row, in the same order"
+    rows = len(columns)
+    source = columns.has_source
+    error = source & columns.source_error.astype(bool)
+    no_error = source & ~error
+
+    no_first_commit = np.isnat(columns.first_commit)
+    no_commits = no_first_commit | np.isnat(columns.latest_commit)
+    over_a_year = columns.latest_commit < np.datetime64(maturity.ONE_YEAR_AGO)
+    over_5_years = columns.latest_commit < np.datetime64(maturity.FIVE_YEARS_AGO)
+    this_year = columns.first_commit > np.datetime64(maturity.ONE_YEAR_AGO)
+    active = no_error & ~no_commits & ~over_a_year
+
+    health = no_error & ~no_first_commit
+    few_authors = columns.max_monthly_authors_count < FEW_MAX_MONTHLY_AUTHORS_CONST
+
+    not_found = columns.package_status == "not_found"
+
+    masks: list[Tuple[np.ndarray, Optional[str]]] = [
+        (~source & not_found, Note.NOT_OPEN_SOURCE),
+        (~source & ~not_found, Note.NO_SOURCE_REPO_NOT_FOUND),
+        # build_maturity_score
+        (error, None),
+        (no_error & no_commits, Note.NO_COMMITS),
+        (no_error & ~no_commits & over_5_years, Note.LAST_COMMIT_OVER_5_YEARS),
+        (
+            no_error & ~no_commits & over_a_year & ~over_5_years,
+            Note.LAST_COMMIT_OVER_A_YEAR,
+        ),
+        (active & this_year, Note.FIRST_COMMIT_THIS_YEAR),
+        # build_health_risk_score
+        (error, None),
+        (no_error & no_first_commit, Note.NO_COMMITS),
+        (health & few_authors, Note.FEW_MAX_MONTHLY_AUTHORS),
+        (health & (columns.recent_authors_count == 1), Note.ONE_AUTHOR_THIS_YEAR),
+        # build_legal_score
+        (error, None),
+    ]
+
+    notes: list[list[str]] = [[] for _ in range(rows)]
+    for mask, note in masks:
+        for i in np.flatnonzero(mask):
+            notes[i].append(note or columns.source_error[i])
+
+    for row, extra in zip(notes, license_notes(columns)):
+        row.extend(extra)
+    for row, extra in zip(notes, package_notes(columns)):
+        row.extend(extra)
+    for mask, note in security_notes(columns):
+        for i in np.flatnonzero(source & mask):
+            notes[i].append(note)
+    return notes
+
+
+def build_scores(columns: ScoreColumns) -> list[ScoreType]:
+    """
+    app_score.build_score for every row of `columns`.
+
+    Most packages share their notes with many others, so the scores are
+    computed once per distinct notes. Each row still gets its own lists.
+    """
+    table = get_score_table()
+    # The order is part of the key because an Unknown score depends on
+    # which note came first
+    scored: dict[tuple[str, ...], tuple[list[str], dict]] = {}
+    scores = []
+    for row in build_notes(columns):
+        notes = tuple(dict.fromkeys(row))
+        if notes not in scored:
+            scored[notes] = (sorted(notes), table.scores(notes))
+        sorted_notes, categories = scored[notes]
+        scores.append(
+            ScoreType(
+                notes=list(sorted_notes),
+                **{
+                    field: CategorizedScore(value=score.value, notes=list(score.notes))
+                    for field, score in categories.items()
+                },
+            )
+        )
+    return scores
@@ -1,6 +1,5 @@
 import logging
-
-import pandas as pd
+from datetime import datetime, timedelta
 
 from score.models import Source
 from score.notes import FEW_MAX_MONTHLY_AUTHORS_CONST, Note
@@ -8,8 +7,8 @@ from score.notes import FEW_MAX_MONTHLY_AUTHORS_CONST, Note
 log = logging.getLogger(__name__)
 
 
-ONE_YEAR_AGO = pd.Timestamp.now() - pd.DateOffset(years=1)
-FIVE_YEARS_AGO = pd.Timestamp.now() - pd.DateOffset(years=5)
+ONE_YEAR_AGO = datetime.now() - timedelta(days=365)
+FIVE_YEARS_AGO = datetime.now() - timedelta(days=365 * 5)
 
 LICENSE_LESS_PERMISSIVES = ["GPL", "AGPL", "LGPL", "Artistic", "CDDL", "MPL"]
 
@@ -1,18 +1,17 @@
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 
-import pandas as pd
 
-
-def safe_date_diff(a, b) -> Optional[pd.Timedelta]:
-    if pd.isnull(a):
+def safe_date_diff(a: Optional[datetime], b: Optional[datetime]) -> Optional[timedelta]:
+    if a is None:
         return None
-    if pd.isnull(b):
+    if b is None:
         return None
 
     # Convert timezone-naive datetimes to UTC
     if a.tzinfo is None:
-        a = pd.to_datetime(a).tz_localize("UTC")
+        a = a.replace(tzinfo=timezone.utc)
     if b.tzinfo is None:
-        b = pd.to_datetime(b).tz_localize("UTC")
+        b = b.replace(tzinfo=timezone.utc)
 
     return a - b
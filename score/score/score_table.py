@@ -0,0 +1,86 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING, Iterable
+
+from score.models import CategorizedScore
+from score.notes import Note, ScoreCategories, ScoreGroups
+
+if TYPE_CHECKING:
+    from score.notes.data import NoteData
+
+# Score field -> (group, initial value), as in the ScoreBuilder constructors
+SCORE_GROUPS = {
+    "legal": (ScoreGroups.LEGAL.value, ScoreCategories.HEALTHY.value),
+    "health_risk": (ScoreGroups.HEALTH.value, ScoreCategories.HEALTHY.value),
+    "maturity": (ScoreGroups.MATURITY.value, ScoreCategories.MATURE.value),
+    "security": (ScoreGroups.SECURITY.value, ScoreCategories.HEALTHY.value),
+}
+
+CATEGORIES = ScoreCategories.values()
+UNKNOWN_RANK = CATEGORIES.index(ScoreCategories.UNKNOWN.value)
+
+
+@dataclass
+class ScoreTable:
+    """
+    The note table compiled to integers: note ids index `codes` and `ranks`,
+    and bit i of a group mask is set if note i counts toward that group.
+
+    Gives the same scores as ScoreBuilder without string lookups.
+    """
+
+    codes: list[str]
+    ids: dict[str, int]
+    # Index of each note's category in ScoreCategories
+    ranks: list[int]
+    # Score field -> (group mask, initial rank)
+    groups: dict[str, tuple[int, int]]
+
+    @classmethod
+    def compile(cls, data: dict[str, "NoteData"]) -> "ScoreTable":
+        codes = list(data)
+        groups = {}
+        for field, (group, initial) in SCORE_GROUPS.items():
+            mask = 0
+            for i, code in enumerate(codes):
+                if data[code]["group"] in (ScoreGroups.ANY.value, group):
+                    mask |= 1 << i
+            groups[field] = (mask, CATEGORIES.index(initial))
+
+        return cls(
+            codes=codes,
+            ids={code: i for i, code in enumerate(codes)},
+            ranks=[CATEGORIES.index(data[code]["category"]) for code in codes],
+            groups=groups,
+        )
+
+    def note_ids(self, notes: Iterable[str]) -> list[int]:
+        "Ids of `notes` without duplicates, in the order given"
+        try:
+            return list(dict.fromkeys(self.ids[note] for note in notes))
+        except KeyError as err:
+            raise ValueError(f"Note {err.args[0]} is not a valid note code")
+
+    def score(self, ids: list[int], field: str) -> CategorizedScore:
+        mask, rank = self.groups[field]
+        members = []
+        for i in ids:
+            if not mask >> i & 1:
+                continue
+            members.append(i)
+            # Like ScoreBuilder.limit, nothing overrides an Unknown score
+            if rank != UNKNOWN_RANK:
+                rank = max(rank, self.ranks[i])
+        return CategorizedScore(
+            value=CATEGORIES[rank], notes=[self.codes[i] for i in members]
+        )
+
+    def scores(self, notes: Iterable[str]) -> dict[str, CategorizedScore]:
+        "The CategorizedScore of each score field, keyed like the Score model"
+        ids = self.note_ids(notes)
+        return {field: self.score(ids, field) for field in self.groups}
+
+
+@lru_cache(maxsize=1)
+def get_score_table() -> ScoreTable:
+    return ScoreTable.compile(Note._data)
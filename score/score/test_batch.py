@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta, timezone
+from hashlib import md5
+
+from hypothesis import HealthCheck, given, settings
+from hypothesis import strategies as st
+
+from score.models import License, Package, Source, Vulnerabilities, Vulnerability
+from score.notes import Note
+from score.utils.normalize_license_content import normalize_license_content
+
+from .app_score import build_score
+from .batch import RESTRICTION_NOTES, ScoreColumns, build_scores
+
+now = datetime.now()
+dates = st.datetimes(min_value=now - timedelta(days=3650), max_value=now)
+aware_dates = dates.map(lambda d: d.replace(tzinfo=timezone.utc))
+mit_md5 = md5(normalize_license_content("MIT").encode("utf-8")).hexdigest()
+names = st.sampled_from(["requests", "Flask_Login", "numpy", "left-pad"])
+
+licenses = st.builds(
+    License,
+    error=st.sampled_from([None, None, Note.LICENSE_NOT_OSS]),
+    license=st.sampled_from(["MIT", "Unknown", "GPL-3.0"]),
+    kind=st.sampled_from([None, "", "MIT", "unknown", "Unknown", "GPL-3.0"]),
+    md5=st.sampled_from([None, mit_md5]),
+    modified=st.booleans(),
+    restrictions=st.lists(st.sampled_from(sorted(RESTRICTION_NOTES)), max_size=3),
+    additional_text=st.sampled_from([None, "", "extra"]),
+    spdx_id=st.sampled_from([None, "MIT"]),
+    is_osi_approved=st.sampled_from([None, True, False]),
+)
+
+sources = st.builds(
+    Source,
+    source_url=st.just("https://github.com/example/example"),
+    error=st.sampled_from([None, None, None, Note.NO_SOURCE_GIT_TIMEOUT]),
+    licenses=st.lists(licenses, max_size=3),
+    package_destinations=st.lists(
+        st.tuples(
+            st.sampled_from(["pypi/requests", "pypi/flask-login", "npm/left-pad"]),
+            st.just("setup.py"),
+        ),
+        max_size=2,
+    ),
+    recent_authors_count=st.none() | st.integers(0, 4),
+    max_monthly_authors_count=st.none() | st.integers(0, 5),
+    first_commit=st.none() | dates,
+    latest_commit=st.none() | dates,
+)
+
+packages = st.builds(
+    Package,
+    name=names,
+    ecosystem=st.sampled_from(["pypi", "npm"]),
+    dependencies=st.just([]),
+    license=st.sampled_from([None, "", "MIT", "GPL-3.0", "Some long text " * 10]),
+    release_date=st.none() | dates | aware_dates,
+    status=st.sampled_from(["ok", "not_found"]),
+)
+
+vulnerabilities = st.builds(
+    Vulnerabilities,
+    vulns=st.lists(
+        st.builds(
+            Vulnerability,
+            id=st.just("GHSA-0000"),
+            published_on=aware_dates,
+            fixed_on=st.none(),
+            severity=st.just("HIGH"),
+            severity_num=st.none() | st.floats(0, 10),
+            days_to_fix=st.none() | st.integers(0, 1200),
+        ),
+        max_size=5,
+    ),
+)
+
+records = st.lists(
+    st.tuples(st.none() | sources, packages, vulnerabilities), max_size=8
+)
+
+
+@settings(max_examples=200, suppress_health_check=[HealthCheck.too_slow])
+@given(records)
+def test_matches_build_score(records):
+    expected = [
+        build_score(source.source_url if source else None, source, package, vulns)
+        for source, package, vulns in records
+    ]
+    assert build_scores(ScoreColumns.from_records(records)) == expected
+
+
+def test_empty():
+    assert build_scores(ScoreColumns.from_records([])) == []
+
+
+def test_rows_do_not_share_lists():
+    package = Package(name="left-pad", ecosystem="npm", dependencies=[])
+    first, second = build_scores(
+        ScoreColumns.from_records([(None, package, Vulnerabilities())] * 2)
+    )
+    assert first == second
+    first.notes.append(Note.HEALTHY)
+    first.legal.notes.append(Note.HEALTHY)
+    assert first.notes != second.notes
+    assert first.legal.notes != second.legal.notes
@@ -0,0 +1,78 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+
+from score.notes import Note
+
+from .score_table import get_score_table
+from .score_type import ScoreBuilder
+
+note_codes = st.lists(st.sampled_from(sorted(Note._data)), max_size=12)
+
+
+def build_with_builder(notes: list[str]):
+    return {
+        "legal": ScoreBuilder.legal(notes).asmodel(),
+        "health_risk": ScoreBuilder.health_risk(notes).asmodel(),
+        "maturity": ScoreBuilder.maturity(notes).asmodel(),
+        "security": ScoreBuilder.security(notes).asmodel(),
+    }
+
+
+@given(note_codes)
+def test_matches_score_builder(notes):
+    assert get_score_table().scores(notes) == build_with_builder(notes)
+
+
+def test_unknown_is_sticky():
+    notes = [Note.NO_SOURCE_REPO_NOT_FOUND, Note.NOT_OPEN_SOURCE]
+    scores = get_score_table().scores(notes)
+    assert scores["legal"].value == "Unknown"
+    assert scores["legal"].notes == notes
+
+    scores = get_score_table().scores(notes[::-1])
+    assert scores["legal"].value == "Not Open Source"
+    assert scores == build_with_builder(notes[::-1])
+
+
+def test_invalid_note():
+    with pytest.raises(ValueError, match="NOT_A_NOTE"):
+        get_score_table().scores(["NOT_A_NOTE"])
+
+
+SCORE_SCRIPT = """
+from datetime import datetime
+from score.models import License, Package, Source, Vulnerabilities
+from score.score.app_score import build_score
+from score.utils.fast_json import dumps
+
+source = Source(
+    source_url="https://github.com/example/example",
+    licenses=[License(license="Unknown", kind="Unknown", modified=True)],
+    first_commit=datetime(2000, 1, 1),
+    latest_commit=datetime(2001, 1, 1),
+    recent_authors_count=1,
+    max_monthly_authors_count=1,
+)
+package = Package(name="example", ecosystem="pypi", dependencies=[])
+score = build_score(source.source_url, source, package, Vulnerabilities())
+print(dumps(score).decode())
+"""
+
+
+def test_same_bytes_for_any_hash_seed():
+    outputs = {
+        subprocess.run(
+            [sys.executable, "-c", SCORE_SCRIPT],
+            env={**os.environ, "PYTHONHASHSEED": seed, "CACHE_LOCATION": "0"},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        for seed in ["1", "2", "3"]
+    }
+    assert len(outputs) == 1
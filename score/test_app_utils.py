@@ -0,0 +1,58 @@
+from unittest import mock
+
+from . import app_utils
+from .git_vcs.probe import Probe
+from .models import Source
+from .notes import Note
+from .utils import caching
+
+URL = "https://github.com/example/example"
+
+
+def test_sha_cache_path_normalizes_url(cache_dir):
+    assert app_utils.sha_cache_path(f"{URL}.git", "abc") == app_utils.sha_cache_path(
+        URL, "abc"
+    )
+
+
+def test_sha_store_skips_clone(cache_dir):
+    stored = Source(source_url=URL, head_sha="abc123", recent_authors_count=3)
+    caching.save_to_cache(stored, app_utils.sha_cache_path(URL, "abc123"))
+
+    headers: dict[str, str] = {}
+    with mock.patch(
+        "score.git_vcs.scrape.probe_remote", return_value=Probe(head_sha="abc123")
+    ), mock.patch("score.git_vcs.scrape.clone_repo") as clone:
+        source = app_utils.create_git_metadata_cached(URL, headers.__setitem__)
+
+    clone.assert_not_called()
+    assert headers["git-sha-cache-hit"] == "true"
+    assert source.recent_authors_count == 3
+    # The url keyed entry is refreshed
+    assert caching.cache_hit(
+        caching.cache_path(f"git/{app_utils.quote_plus(URL)}.json")
+    )
+
+
+def test_sha_store_expires(cache_dir, monkeypatch):
+    stored = Source(source_url=URL, head_sha="abc123", recent_authors_count=3)
+    caching.save_to_cache(stored, app_utils.sha_cache_path(URL, "abc123"))
+    monkeypatch.setattr(app_utils, "SHA_CACHE_DAYS", -1)
+
+    assert app_utils.load_git_metadata_by_sha(URL, "abc123") is None
+
+
+def test_sha_store_miss_clones(cache_dir):
+    headers: dict[str, str] = {}
+    with mock.patch(
+        "score.git_vcs.scrape.probe_remote", return_value=Probe(head_sha="def456")
+    ), mock.patch("score.git_vcs.scrape.clone_repo") as clone:
+        clone.return_value.__enter__.return_value = (
+            None,
+            Source(source_url=URL, error=Note.NO_SOURCE_OTHER_GIT_ERROR),
+        )
+        source = app_utils.create_git_metadata_cached(URL, headers.__setitem__)
+
+    clone.assert_called_once()
+    assert headers["git-sha-cache-hit"] == "false"
+    assert source.error is not None
@@ -0,0 +1,42 @@
+import json
+
+from .recent_packages import RecentPackages, recent_packages_path
+from .utils import caching
+
+
+def test_bounded_and_deduplicated():
+    recent = RecentPackages(size=3, sync_interval=0)
+    for name in ["a", "b", "a", "c"]:
+        recent.add("pypi", name)
+    assert recent.recent(10) == [("pypi", "c"), ("pypi", "a"), ("pypi", "b")]
+
+    recent.add("npm", "d")
+    assert recent.recent(2) == [("npm", "d"), ("pypi", "c")]
+    assert len(recent.recent(10)) == 3
+
+
+def test_merged_through_cache(cache_dir):
+    first = RecentPackages(size=3)
+    first.add("pypi", "x")
+    first.add("pypi", "y")
+    first.sync()
+
+    second = RecentPackages(size=3)
+    second.add("pypi", "z")
+    second.add("pypi", "x")
+    second.start().join()
+    assert second.start() is None
+    # Packages from other instances are older than the ones seen here
+    assert second.recent(10) == [("pypi", "x"), ("pypi", "z"), ("pypi", "y")]
+
+    second.sync()
+    with open(recent_packages_path()) as fp:
+        assert json.load(fp) == [["pypi", "x"], ["pypi", "z"], ["pypi", "y"]]
+
+
+def test_unreadable_cache(cache_dir):
+    caching.save_text_to_cache("not json", recent_packages_path())
+    recent = RecentPackages()
+    recent.add("pypi", "x")
+    recent.start().join()
+    assert recent.recent(10) == [("pypi", "x")]
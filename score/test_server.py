@@ -1,8 +1,25 @@
+import gzip
+from datetime import datetime
 from unittest.mock import ANY
+from urllib.parse import quote_plus
 
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
 
-from .app import app
+from . import app_utils
+from .app import CATEGORY_NOTES, NotesResponse, ScoreResponse, app
+from .git_vcs.license_detection import (
+    content_hash,
+    get_reference_matcher,
+    license_content_path,
+)
+from .models import License, Package, Source, Vulnerabilities
+from .notes.notes import ScoreCategories, ScoreGroups, to_dict
+from .recent_packages import recently_scored
+from .score.app_score import build_score
+from .utils.caching import cache_path, save_text_to_cache, save_to_cache
 
 client = TestClient(app)
 
@@ -15,3 +32,145 @@ def test_read_root():
         "html_docs_url": "https://opensourcescore.dev/docs",
         "source_code_url": ANY,
     }
+
+
+def test_clone_metrics():
+    response = client.get("/metrics/clones")
+    assert response.status_code == 200
+    assert response.headers["Cache-control"] == "no-store"
+    assert response.json()["queue_depth"] == 0
+
+
+def test_recent_packages_limit():
+    assert client.get("/recent/packages?limit=0").json() == {"recent_packages": []}
+    assert client.get("/recent/packages?limit=-1").status_code == 422
+
+
+def test_license_diff():
+    content = "Permission to use this software is granted\n"
+    content_sha256 = content_hash(content)
+    save_text_to_cache(content, license_content_path(content_sha256))
+
+    response = client.get(f"/license/diff/MIT/{content_sha256}")
+    assert response.status_code == 200
+    assert "immutable" in response.headers["Cache-control"]
+    assert response.text.startswith("--- https://opensource.org/license/MIT")
+    assert "+Permission to use this software is granted" in response.text
+
+    assert (
+        client.get(f"/license/diff/NOT-A-LICENSE/{content_sha256}").status_code == 404
+    )
+    assert client.get("/license/diff/MIT/0000").status_code == 404
+    assert client.get(f"/license/diff/MIT/{content_sha256.upper()}").status_code == 404
+    assert client.get("/license/diff/MIT/..%2F..%2Fsecret").status_code == 404
+
+
+def test_score_response_cache(monkeypatch, cache_dir):
+    app_utils.score_responses.clear()
+
+    url = "https://github.com/example/example"
+    package = Package(name="example", ecosystem="pypi", dependencies=[], source_url=url)
+    source = Source(
+        source_url=url,
+        licenses=[License(license="MIT", kind="Permissive", spdx_id="MIT")],
+        first_commit=datetime(2020, 1, 1),
+        latest_commit=datetime(2021, 1, 1),
+    )
+    vulns = Vulnerabilities()
+    save_to_cache(package, cache_path("packages/pypi/example.json"))
+    save_to_cache(source, cache_path(f"git/{quote_plus(url)}.json"))
+    save_to_cache(vulns, cache_path("vuln/pypi/example.json"))
+
+    first = client.get("/score/pypi/example")
+    assert first.status_code == 200
+    assert first.headers["score-cache-hit"] == "false"
+    assert first.headers["git-cache-hit"] == "true"
+    expected = ScoreResponse(
+        ecosystem="pypi",
+        package_name="example",
+        package=package,
+        source=source,
+        score=build_score(url, source, package, vulns),
+        status="ok",
+        vulnerabilities=vulns,
+    )
+    assert first.json() == jsonable_encoder(expected)
+
+    second = client.get("/score/pypi/example")
+    assert second.headers["score-cache-hit"] == "true"
+    assert second.headers["pkg-cache-hit"] == "true"
+    assert second.content == first.content
+    assert second.headers["ETag"] == first.headers["ETag"]
+
+    not_modified = client.get(
+        "/score/pypi/example", headers={"If-None-Match": first.headers["ETag"]}
+    )
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["ETag"] == first.headers["ETag"]
+
+    # New input data is a new key
+    source.recent_authors_count = 1
+    save_to_cache(source, cache_path(f"git/{quote_plus(url)}.json"))
+    third = client.get("/score/pypi/example")
+    assert third.headers["score-cache-hit"] == "false"
+    assert third.json()["source"]["recent_authors_count"] == 1
+
+    response = client.get("/recent/packages")
+    assert response.json()["recent_packages"][0] == ["pypi", "example"]
+
+
+def test_notes_etag():
+    response = client.get("/notes/categories")
+    assert response.status_code == 200
+    # Same bytes as with the response_model
+    adapter = TypeAdapter(NotesResponse)
+    notes = adapter.validate_python(
+        {
+            "notes": {v["code"]: v for v in to_dict().values()},
+            "categories": ScoreCategories.values(),
+            "groups": ScoreGroups.values(),
+        }
+    )
+    assert response.content == JSONResponse(adapter.dump_python(notes)).body
+
+    etag = response.headers["ETag"]
+    for if_none_match in [etag, f"W/{etag}", f'"other", {etag}', "*"]:
+        response = client.get(
+            "/notes/categories", headers={"If-None-Match": if_none_match}
+        )
+        assert response.status_code == 304
+    assert client.get("/notes", headers={"If-None-Match": etag}).status_code == 200
+
+    response = client.get("/notes")
+    assert response.content == JSONResponse(jsonable_encoder(to_dict())).body
+
+
+def test_compression():
+    with client.stream(
+        "GET", "/notes/categories", headers={"Accept-Encoding": "gzip"}
+    ) as response:
+        body = b"".join(response.iter_raw())
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.headers["ETag"] == CATEGORY_NOTES.encoded_etag("gzip")
+    assert gzip.decompress(body) == CATEGORY_NOTES.body
+    # Served from the precomputed copy
+    assert body == CATEGORY_NOTES.compressed["gzip"]
+
+    response = client.get(
+        "/notes/categories",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": CATEGORY_NOTES.etag},
+    )
+    assert response.status_code == 304
+
+    response = client.get("/notes/categories", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in response.headers
+    assert response.content == CATEGORY_NOTES.body
+
+
+def test_lifespan_builds_reference_matcher(monkeypatch):
+    get_reference_matcher.cache_clear()
+    monkeypatch.setattr(recently_scored, "start", lambda: None)
+    with TestClient(app):
+        assert get_reference_matcher.cache_info().currsize == 1
@@ -1,3 +1,4 @@
+import hashlib
 import json
 import logging
 import os
@@ -61,40 +62,113 @@ def cache_hit(filename, days=1):
 T = TypeVar("T")
 
 
+def parse_cached(datacls: Type[T], text: str) -> T:
+    data = from_dict(
+        datacls,
+        json.loads(text),
+        config=Config(
+            type_hooks={
+                datetime: datetime.fromisoformat,
+                Note: lambda x: getattr(Note, x),
+                Tuple[str, str]: tuple,  # type: ignore
+            }
+        ),
+    )
+    set_content_digest(data, text)
+    return data
+
+
 def load_from_cache(datacls: Type[T], cache_filename: str) -> Optional[T]:
     if CACHE_LOCATION == "0":
         return None
 
     try:
         with fs.open(cache_filename, "r") as fp:
-            data = json.load(fp)
-        pkg = from_dict(
-            datacls,
-            data,
-            config=Config(
-                type_hooks={
-                    datetime: datetime.fromisoformat,
-                    Note: lambda x: getattr(Note, x),
-                    Tuple[str, str]: tuple,  # type: ignore
-                }
-            ),
-        )
+            text = fp.read()
+        pkg = parse_cached(datacls, text)
         log.info(f"Cache hit for {cache_filename}")
         return pkg
+    except FileNotFoundError:
+        log.info(f"Cache miss for {cache_filename}")
     except Exception:
         log.exception("Failed to load package data from cache. fetching package data")
 
     return None
 
 
+def load_many_from_cache(datacls: Type[T], cache_filenames: list[str]) -> dict[str, T]:
+    """
+    load_from_cache for many files in one batch, the backend fetches them
+    concurrently. Files that are missing or fail to load are left out.
+    """
+    if CACHE_LOCATION == "0" or not cache_filenames:
+        return {}
+
+    # The keys of fs.cat are the paths without the protocol
+    filenames = {fs._strip_protocol(name): name for name in cache_filenames}
+    try:
+        contents = fs.cat(list(filenames), on_error="return")
+    except Exception:
+        log.exception(f"Failed to load {len(filenames)} files from cache")
+        return {}
+
+    loaded = {}
+    for path, content in contents.items():
+        if isinstance(content, FileNotFoundError):
+            continue
+        try:
+            if isinstance(content, Exception):
+                raise content
+            loaded[filenames[path]] = parse_cached(datacls, content.decode())
+        except Exception:
+            log.exception(f"Failed to load {filenames[path]} from cache")
+    log.info(f"Cache hits for {len(loaded)} of {len(filenames)} files")
+    return loaded
+
+
 def save_to_cache(data: Any, cache_filename: str) -> None:
     if CACHE_LOCATION == "0":
         return None
 
-    dict_data = asdict(data)
+    text = json.dumps(asdict(data), default=default_with_datetime)
+    fs.makedirs(os.path.dirname(cache_filename), exist_ok=True)
+    with fs.open(cache_filename, "w") as fp:
+        fp.write(text)
+    set_content_digest(data, text)
+
+
+def set_content_digest(data: Any, text: str) -> None:
+    setattr(data, "_content_digest", hashlib.sha256(text.encode()).hexdigest())
+
+
+def content_digest(data: Any) -> Optional[str]:
+    """
+    sha256 of the JSON that `data` was loaded from or saved to the cache as,
+    None for data that did not go through the cache.
+    """
+    return getattr(data, "_content_digest", None)
+
+
+def save_text_to_cache(text: str, cache_filename: str) -> bool:
+    "Returns whether the text was stored, it is not if caching is disabled"
+    if CACHE_LOCATION == "0":
+        return False
+
     fs.makedirs(os.path.dirname(cache_filename), exist_ok=True)
     with fs.open(cache_filename, "w") as fp:
-        json.dump(dict_data, fp, default=default_with_datetime)
+        fp.write(text)
+    return True
+
+
+def load_text_from_cache(cache_filename: str) -> Optional[str]:
+    if CACHE_LOCATION == "0":
+        return None
+
+    try:
+        with fs.open(cache_filename, "r") as fp:
+            return fp.read()
+    except FileNotFoundError:
+        return None
 
 
 def default_with_datetime(obj):
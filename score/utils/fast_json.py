@@ -0,0 +1,158 @@
+import gzip
+import hashlib
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import brotli
+import orjson
+from fastapi import Request, Response
+
+from score.notes import Note
+
+log = logging.getLogger(__name__)
+
+# Smaller responses fit in a packet or two, compressing them saves nothing
+COMPRESSION_MIN_SIZE = int(os.environ.get("SCORE_COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# UTC datetimes end in Z as with pydantic, not +00:00
+OPTIONS = orjson.OPT_UTC_Z
+
+
+def default(obj):
+    if isinstance(obj, Note):
+        return obj.name
+    raise TypeError(f"Type {type(obj)} not serializable")
+
+
+def dumps(data: Any) -> bytes:
+    """
+    Serialize models to the same JSON as FastAPI with their response_model,
+    without converting them to pydantic models first.
+    """
+    return orjson.dumps(data, default=default, option=OPTIONS)
+
+
+def make_etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str, etags: set[str]) -> bool:
+    "If-None-Match uses the weak comparison, W/ prefixes are ignored"
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        tag.strip().removeprefix("W/") in etags for tag in if_none_match.split(",")
+    )
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def supported_encodings() -> list[str]:
+    "In order of preference"
+    return ["br", "gzip"]
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    "The content coding to send for an Accept-Encoding header, None for identity"
+    if not accept_encoding:
+        return None
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        name, _, value = params.strip().partition("=")
+        if name.strip() == "q":
+            try:
+                q = float(value)
+            except ValueError:
+                q = 0.0
+        weights[coding.strip().lower()] = q
+
+    star = weights.get("*", 0.0)
+    # max keeps the first of equal weights, the preferred one
+    q, encoding = max(
+        ((weights.get(encoding, star), encoding) for encoding in supported_encodings()),
+        key=lambda candidate: candidate[0],
+    )
+    return encoding if q > 0 else None
+
+
+@dataclass(frozen=True)
+class Encoded:
+    """
+    A serialized JSON response and its strong ETag. Compressed copies are
+    kept with it so that cached responses are compressed only once.
+    """
+
+    body: bytes
+    etag: str
+    compressed: dict[str, bytes] = field(default_factory=dict, compare=False)
+
+    @classmethod
+    def of(cls, data: Any) -> "Encoded":
+        body = dumps(data)
+        return cls(body=body, etag=make_etag(body))
+
+    def encoded_body(self, encoding: str) -> bytes:
+        if encoding not in self.compressed:
+            self.compressed[encoding] = compress(self.body, encoding)
+        return self.compressed[encoding]
+
+    def encoded_etag(self, encoding: str) -> str:
+        "Each content coding is a different representation with its own tag"
+        return f'{self.etag[:-1]}-{encoding}"'
+
+    def etags(self) -> set[str]:
+        "The tags of this body in every content coding, any of them matches"
+        return {self.etag} | {self.encoded_etag(e) for e in supported_encodings()}
+
+
+def json_response(encoded: Encoded, request: Request, response: Response) -> Response:
+    """
+    `encoded` with the headers set on the `response` parameter, compressed
+    if the client accepts it, or 304 Not Modified if the client already
+    has it.
+    """
+    encoding = None
+    if len(encoded.body) >= COMPRESSION_MIN_SIZE:
+        encoding = choose_encoding(request.headers.get("Accept-Encoding"))
+    etag = encoded.etag if encoding is None else encoded.encoded_etag(encoding)
+
+    compress_time = 0.0
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None and etag_matches(if_none_match, encoded.etags()):
+        reply = Response(status_code=304)
+    elif encoding is None:
+        reply = Response(encoded.body, media_type="application/json")
+    else:
+        # Only the first response of a cached Encoded pays for compression
+        s = time.perf_counter()
+        body = encoded.encoded_body(encoding)
+        compress_time = time.perf_counter() - s
+        reply = Response(
+            body,
+            media_type="application/json",
+            headers={"Content-Encoding": encoding},
+        )
+    log.info(
+        f"Sent {len(reply.body)} of {len(encoded.body)} bytes",
+        extra={
+            "content_encoding": encoding or "identity",
+            "body_size": len(encoded.body),
+            "response_size": len(reply.body),
+            "compress_ms": round(compress_time * 1000, 3),
+        },
+    )
+    reply.headers.raw.extend(response.headers.raw)
+    reply.headers["ETag"] = etag
+    reply.headers["Vary"] = "Accept-Encoding"
+    return reply
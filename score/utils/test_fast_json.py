@@ -0,0 +1,127 @@
+import gzip
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from score.models import (
+    Dependency,
+    License,
+    Package,
+    Source,
+    Vulnerabilities,
+    Vulnerability,
+)
+
+from . import fast_json
+from .fast_json import Encoded, choose_encoding, dumps, etag_matches, json_response
+
+MODELS = [
+    Package(
+        name="naïve-pkg",
+        ecosystem="pypi",
+        dependencies=[Dependency(name="requests", specifiers=[">=2", "<3"])],
+        release_date=datetime(2024, 5, 1, 12, 30, 15, 123456),
+    ),
+    Source(
+        source_url="https://github.com/example/example",
+        licenses=[
+            License(
+                path="LICENSE",
+                license="MIT",
+                similarity=0.987654321,
+                restrictions=["patent-grant"],
+            )
+        ],
+        package_destinations=[("pypi/example", "pyproject.toml")],
+        first_commit=datetime(2020, 1, 1),
+    ),
+    Vulnerabilities(
+        vulns=[
+            Vulnerability(
+                id="GHSA-0000",
+                published_on=datetime(2023, 1, 1, tzinfo=timezone.utc),
+                fixed_on=datetime(2023, 2, 1, tzinfo=timezone(timedelta(hours=2))),
+                severity="HIGH",
+                severity_num=7.5,
+                days_to_fix=31,
+            )
+        ]
+    ),
+]
+
+
+@pytest.mark.parametrize("model", MODELS, ids=lambda m: type(m).__name__)
+def test_matches_response_model(model):
+    # What FastAPI does for a route with response_model=type(model)
+    expected = JSONResponse(
+        TypeAdapter(type(model)).dump_python(model, mode="json")
+    ).body
+    assert dumps(model) == expected
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        (None, None),
+        ("", None),
+        ("gzip", "gzip"),
+        ("deflate, gzip;q=0.5", "gzip"),
+        ("gzip;q=0", None),
+        ("identity", None),
+        ("*", "gzip"),
+        ("*;q=0.1, gzip;q=0", None),
+    ],
+)
+def test_choose_encoding(monkeypatch, accept_encoding, expected):
+    monkeypatch.setattr(fast_json, "supported_encodings", lambda: ["gzip"])
+    assert choose_encoding(accept_encoding) == expected
+
+
+def test_choose_encoding_prefers_brotli():
+    assert choose_encoding("gzip, deflate, br") == "br"
+    assert choose_encoding("gzip, br;q=0.5") == "gzip"
+
+
+def test_compressed_once(monkeypatch):
+    encoded = Encoded.of(MODELS[1])
+    body = encoded.encoded_body("gzip")
+    assert gzip.decompress(body) == encoded.body
+
+    monkeypatch.setattr(fast_json, "compress", None)
+    assert encoded.encoded_body("gzip") is body
+
+
+def test_small_responses_are_not_compressed():
+    request = Request({"type": "http", "headers": [(b"accept-encoding", b"gzip")]})
+    encoded = Encoded.of({"small": True})
+    reply = json_response(encoded, request, Response())
+    assert "Content-Encoding" not in reply.headers
+    assert reply.body == encoded.body
+
+
+def test_etag_matches_only_known_codings(monkeypatch):
+    monkeypatch.setattr(fast_json, "supported_encodings", lambda: ["gzip"])
+    encoded = Encoded.of(MODELS[1])
+    etags = encoded.etags()
+    assert etag_matches(encoded.etag, etags)
+    assert etag_matches(f"W/{encoded.encoded_etag('gzip')}", etags)
+    assert etag_matches('"other", *', etags) is False
+    assert etag_matches("*", etags)
+    assert not etag_matches(encoded.encoded_etag("deflate"), etags)
+    assert not etag_matches(f'{encoded.etag[:-1]}-gzip-x"', etags)
+
+
+def test_response_sizes_are_logged(caplog):
+    request = Request({"type": "http", "headers": [(b"accept-encoding", b"gzip")]})
+    encoded = Encoded.of(MODELS[1].licenses * 50)
+    with caplog.at_level("INFO", logger=fast_json.__name__):
+        reply = json_response(encoded, request, Response())
+
+    (record,) = caplog.records
+    assert record.content_encoding == "gzip"
+    assert record.body_size == len(encoded.body)
+    assert record.response_size == len(reply.body) < len(encoded.body)
+    assert record.compress_ms >= 0